@@ -3,7 +3,7 @@
 import bcrypt
 import getpass # Dit is een standaard-python library: zorgt ervoor dat de wachtwoord niet vertoont wordt tijdens het invullen
 import time
-import config, services, models, database
+import config, services, models
 from encryption import EncryptionManager
 
 login_attempts = {}
@@ -55,29 +55,21 @@ def login() -> models.User | None:
     password = getpass.getpass("Enter password: (When entering the password it is hidden by getpass, you are still typing) ") # Hides password input
 
     # --- Handle User Login (from Database) ---
-    all_users_from_db = services.get_all_users_raw() # Gets all raw user data
-    
-    user_found = False
-    for user_row in all_users_from_db:
-        decrypted_username = services.encryption_manager.decrypt(user_row['username'])
-        
-        if decrypted_username.lower() == username.lower():
-            user_found = True
-            if verify_password(password, user_row['password_hash']):
-                print(f"Welcome, {decrypted_username}!")
+    # Resolves through the username blind index: one indexed point query
+    # instead of decrypting every stored username per login attempt.
+    user_row = services._find_user_by_username(username)
+    if user_row is not None and verify_password(password, user_row['password_hash']):
+        logged_in_user = decrypt_user_row(user_row)
+        print(f"Welcome, {logged_in_user.username}!")
 
-                if username.lower() in login_attempts:
-                    del login_attempts[username.lower()]
+        if username.lower() in login_attempts:
+            del login_attempts[username.lower()]
 
-                logged_in_user = decrypt_user_row(user_row)
+        # --- NEW: Check for unread suspicious logs for admins ---
+        if logged_in_user.role in [config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN]:
+            services.check_for_unread_suspicious_logs()
 
-                # --- NEW: Check for unread suspicious logs for admins ---
-                if logged_in_user.role in [config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN]:
-                    services.check_for_unread_suspicious_logs()
-
-                return logged_in_user
-            else:
-                break
+        return logged_in_user
 
     # --- Handle Failed Login ---
     if username.lower() in login_attempts:
@@ -91,17 +83,7 @@ def login() -> models.User | None:
 
 def get_user_by_username(username: str) -> models.User | None:
     """Finds a user by their plaintext username and returns a User object."""
-    conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users")
-    all_users = cursor.fetchall()
-    conn.close()
-
-    for user_row in all_users:
-        try:
-            decrypted_username = encryption_manager.decrypt(user_row['username'])
-            if decrypted_username.lower() == username.lower():
-                return decrypt_user_row(user_row)
-        except Exception:
-            continue
-    return None
\ No newline at end of file
+    user_row = services._find_user_by_username(username)
+    if user_row is None:
+        return None
+    return decrypt_user_row(user_row)
\ No newline at end of file
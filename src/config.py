@@ -30,4 +30,8 @@ PREDEFINED_CITIES = [
     "Almere",
     "Breda",
     "Nijmegen"
-]
\ No newline at end of file
+]
+
+# Frozen set counterpart for membership checks; the list above keeps its
+# order for display in prompts and error messages.
+PREDEFINED_CITY_SET = frozenset(PREDEFINED_CITIES)
\ No newline at end of file
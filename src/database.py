@@ -6,11 +6,93 @@ import config
 from encryption import EncryptionManager
 from auth import hash_password
 
+# Single long-lived connection shared by all service calls. Opening a fresh
+# connection per call re-parses the schema and re-applies PRAGMAs each time,
+# which dominates the cost of the short statements this CLI issues.
+_connection = None
+
 def get_db_connection():
-    """Establishes and returns a connection to the SQLite database."""
-    conn = sqlite3.connect(config.DATABASE_FILE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Returns the shared connection to the SQLite database, opening it on first use."""
+    global _connection
+    if _connection is None:
+        conn = sqlite3.connect(config.DATABASE_FILE)
+        conn.row_factory = sqlite3.Row
+        # WAL lets reads proceed while a write commits and turns commits into
+        # sequential log appends; synchronous=NORMAL is the recommended pairing
+        # (durable against crashes, one fsync per checkpoint instead of per
+        # commit). mmap serves read pages straight from the page cache.
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -20000")
+        _connection = conn
+    return _connection
+
+def close_db_connection():
+    """Closes the shared connection; the next get_db_connection() reopens it.
+    Needed when the database file itself is replaced (backup restore)."""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+_BLIND_INDEX_COLUMNS = {
+    'travellers': ('email_bi', 'phone_bi', 'license_bi', 'zip_bi', 'house_bi'),
+    'scooters': ('serial_bi', 'brand_bi', 'model_bi'),
+}
+
+# zip_bi and house_bi are only ever queried together (find-by-address), so
+# they share one composite index instead of two single-column ones.
+_COMPOSITE_INDEX_COLUMNS = {'zip_bi', 'house_bi'}
+
+def _ensure_username_index(cursor, encryption_manager):
+    """Adds the username blind-index column and backfills rows that predate it.
+
+    Login previously decrypted every stored username to find a match; the
+    HMAC digest lets it be a single indexed point query instead."""
+    cursor.execute("PRAGMA table_info(users)")
+    if 'username_bi' not in {row['name'] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE users ADD COLUMN username_bi BLOB")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username_bi ON users(username_bi)")
+    cursor.execute("SELECT id, username FROM users WHERE username_bi IS NULL")
+    for row in cursor.fetchall():
+        username = encryption_manager.decrypt(row['username'])
+        if username:
+            cursor.execute(
+                "UPDATE users SET username_bi = ? WHERE id = ?",
+                (encryption_manager.blind_index(username), row['id'])
+            )
+
+def _ensure_restore_code_index(cursor, encryption_manager):
+    """Adds the restore-code blind-index column and backfills rows that predate it.
+
+    Revoking a code previously decrypted every active row to find a match;
+    the HMAC digest makes it a single indexed point query instead."""
+    cursor.execute("PRAGMA table_info(restore_codes)")
+    if 'code_hmac' not in {row['name'] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE restore_codes ADD COLUMN code_hmac BLOB")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_restore_codes_code_hmac ON restore_codes(code_hmac)")
+    cursor.execute("SELECT id, code FROM restore_codes WHERE code_hmac IS NULL")
+    for row in cursor.fetchall():
+        code = encryption_manager.decrypt(row['code'])
+        if code:
+            cursor.execute(
+                "UPDATE restore_codes SET code_hmac = ? WHERE id = ?",
+                (encryption_manager.blind_index(code), row['id'])
+            )
+
+def _ensure_blind_index_columns(cursor):
+    """Adds missing blind-index columns and their indexes to existing tables."""
+    for table, columns in _BLIND_INDEX_COLUMNS.items():
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row['name'] for row in cursor.fetchall()}
+        for column in columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} BLOB")
+            if column not in _COMPOSITE_INDEX_COLUMNS:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_travellers_zip_house ON travellers(zip_bi, house_bi)")
 
 def initialize_database():
     """
@@ -29,28 +111,31 @@ def initialize_database():
         role TEXT NOT NULL,
         first_name BLOB NOT NULL,
         last_name BLOB NOT NULL,
-        registration_date TEXT NOT NULL
+        registration_date TEXT NOT NULL,
+        username_bi BLOB
     )
     """)
 
     # Insert hardcoded super administrator if not exists
     try:
         encryption_manager = EncryptionManager(config.ENCRYPTION_KEY_FILE)
+        _ensure_username_index(cursor, encryption_manager)
         encrypted_username = encryption_manager.encrypt('super_admin')
         encrypted_first_name = encryption_manager.encrypt('Super')
         encrypted_last_name = encryption_manager.encrypt('Admin')
         hashed_password = hash_password('Admin_123?')
         
         cursor.execute("""
-        INSERT OR IGNORE INTO users (username, password_hash, role, first_name, last_name, registration_date)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT OR IGNORE INTO users (username, password_hash, role, first_name, last_name, registration_date, username_bi)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
             encrypted_username,
             hashed_password,
             config.ROLE_SUPER_ADMIN,
             encrypted_first_name,
             encrypted_last_name,
-            '2025-06-17'
+            '2025-06-17',
+            encryption_manager.blind_index('super_admin')
         ))
 
         # Insert dummy System Administrator
@@ -59,15 +144,16 @@ def initialize_database():
         encrypted_last_name = encryption_manager.encrypt('Admin')
         hashed_password = hash_password('SysAdmin_123?')
         cursor.execute("""
-        INSERT OR IGNORE INTO users (username, password_hash, role, first_name, last_name, registration_date)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT OR IGNORE INTO users (username, password_hash, role, first_name, last_name, registration_date, username_bi)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
             encrypted_username,
             hashed_password,
             config.ROLE_SYSTEM_ADMIN,
             encrypted_first_name,
             encrypted_last_name,
-            '2025-06-17'
+            '2025-06-17',
+            encryption_manager.blind_index('sys_admin')
         ))
 
         # Insert dummy Service Engineer
@@ -76,15 +162,16 @@ def initialize_database():
         encrypted_last_name = encryption_manager.encrypt('Engineer')
         hashed_password = hash_password('ServiceEng_123?')
         cursor.execute("""
-        INSERT OR IGNORE INTO users (username, password_hash, role, first_name, last_name, registration_date)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT OR IGNORE INTO users (username, password_hash, role, first_name, last_name, registration_date, username_bi)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
             encrypted_username,
             hashed_password,
             config.ROLE_SERVICE_ENGINEER,
             encrypted_first_name,
             encrypted_last_name,
-            '2025-06-17'
+            '2025-06-17',
+            encryption_manager.blind_index('service_eng')
         ))
     except Exception as e:
         print(f"Error during super_admin initialization: {e}")
@@ -105,7 +192,12 @@ def initialize_database():
         email BLOB NOT NULL,
         mobile_phone BLOB NOT NULL,
         driving_license_number BLOB NOT NULL,
-        registration_date TEXT NOT NULL
+        registration_date TEXT NOT NULL,
+        email_bi BLOB,
+        phone_bi BLOB,
+        license_bi BLOB,
+        zip_bi BLOB,
+        house_bi BLOB
     )
     """)
 
@@ -126,9 +218,17 @@ def initialize_database():
         location_lon TEXT,
         out_of_service_status INTEGER DEFAULT 0,
         mileage REAL,
-        last_maintenance_date TEXT
+        last_maintenance_date TEXT,
+        serial_bi BLOB,
+        brand_bi BLOB,
+        model_bi BLOB
     )
     """)
+
+    # Blind-index columns hold deterministic HMAC digests of searchable
+    # fields so exact-match searches can use an index instead of decrypting
+    # every row. Older databases are migrated in place.
+    _ensure_blind_index_columns(cursor)
     
     # --- Create logs table ---
     cursor.execute("""
@@ -143,6 +243,39 @@ def initialize_database():
         is_read INTEGER DEFAULT 0 NOT NULL
     )
     """)
+    # Partial index over just the unread suspicious rows: the login alert
+    # count becomes an index-only scan of that (normally tiny) subset
+    # instead of a walk over the whole logs table.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_logs_unread_suspicious "
+        "ON logs(id) WHERE suspicious = 1 AND is_read = 0"
+    )
+
+    # --- Create traveller search-token index ---
+    # Holds HMAC digests of exact values and trigrams of the searchable
+    # traveller fields, so partial searches can resolve through the index
+    # instead of decrypting the whole table. Tokens repeat across rows, so
+    # token_hmac is deliberately not unique.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS traveller_search_index (
+        traveller_id INTEGER NOT NULL,
+        token_hmac BLOB NOT NULL
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tsi_token ON traveller_search_index(token_hmac)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tsi_traveller ON traveller_search_index(traveller_id)")
+
+    # --- Create scooter search-token index ---
+    # Same scheme for scooters: partial serial/brand/model searches resolve
+    # through trigram HMAC tokens instead of a full decrypt scan.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scooter_search_index (
+        scooter_id INTEGER NOT NULL,
+        token_hmac BLOB NOT NULL
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ssi_token ON scooter_search_index(token_hmac)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ssi_scooter ON scooter_search_index(scooter_id)")
 
     # --- Create restore_codes table ---
     cursor.execute("""
@@ -152,10 +285,21 @@ def initialize_database():
         backup_filename TEXT NOT NULL,
         system_admin_username TEXT NOT NULL,
         is_used INTEGER DEFAULT 0 NOT NULL,
-        generated_at TEXT NOT NULL
+        generated_at TEXT NOT NULL,
+        code_hmac BLOB
     )
     """)
+    try:
+        _ensure_restore_code_index(cursor, encryption_manager)
+    except Exception as e:
+        print(f"Error during restore_codes migration: {e}")
+    # Spent codes accumulate forever; the partial index covers only the
+    # active ones, so the restore-path lookup stays proportional to the
+    # handful of outstanding codes rather than the table's history.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rc_active "
+        "ON restore_codes(system_admin_username, backup_filename) WHERE is_used = 0"
+    )
 
     conn.commit()
-    conn.close()
     print("Database initialized successfully.")
\ No newline at end of file
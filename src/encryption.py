@@ -1,16 +1,28 @@
 # src/encryption.py
 
+import hmac
 import os
+from functools import lru_cache
 from cryptography.fernet import Fernet, InvalidToken
 
 class EncryptionManager:
     """
     Manages loading, generating, and using a Fernet key for symmetric encryption.
+
+    The key file is read and the Fernet cipher constructed exactly once in
+    __init__; every encrypt/decrypt reuses that cached cipher, so hot paths
+    never re-derive key material. Fernet objects are stateless per call and
+    safe to share across threads.
     """
     def __init__(self, key_path: str):
         self.key_path = key_path
         self._load_or_generate_key()
         self.cipher = Fernet(self.key)
+        # A Fernet token always decrypts to the same plaintext, so repeat
+        # decrypts of the same blob (every search pass over unchanged rows)
+        # can come from a bounded cache instead of redoing the AES work.
+        # No invalidation is needed: updates write brand-new tokens.
+        self._decrypt_cached = lru_cache(maxsize=8192)(self._decrypt_token)
 
     def _load_or_generate_key(self):
         """Loads the key from key_path or generates a new one if it doesn't exist."""
@@ -36,6 +48,43 @@ class EncryptionManager:
         encoded_data = data.encode('utf-8')
         return self.cipher.encrypt(encoded_data)
 
+    def encrypt_many(self, values: list[str]) -> list[bytes]:
+        """
+        Encrypts a list of strings with the already-initialized cipher.
+        The key is loaded once in __init__, so this only saves the repeated
+        attribute lookups when a caller encrypts a whole record at once.
+        """
+        encrypt = self.cipher.encrypt
+        return [encrypt(value.encode('utf-8')) for value in values]
+
+    def _decrypt_token(self, ciphertext: bytes) -> str:
+        """Uncached decrypt of a single token; "" if the token is invalid."""
+        try:
+            return self.cipher.decrypt(ciphertext).decode('utf-8')
+        except InvalidToken:
+            return ""
+
+    def decrypt_many(self, ciphertexts: list[bytes]) -> list[str]:
+        """
+        Decrypts a list of ciphertexts with the already-initialized cipher.
+        Counterpart of encrypt_many for row-at-a-time result building; any
+        undecryptable entry becomes "" just like decrypt().
+        """
+        decrypt_cached = self._decrypt_cached
+        return [decrypt_cached(ciphertext) for ciphertext in ciphertexts]
+
+    def blind_index(self, data: str) -> bytes:
+        """
+        Computes a deterministic HMAC-SHA256 digest of a lowercased string.
+        Unlike encrypt(), the same input always produces the same output, so
+        the digest can be stored next to the ciphertext and matched with a
+        plain equality query without decrypting anything. The digest reveals
+        only whether two values are equal, never the value itself.
+        """
+        if not isinstance(data, str):
+            raise TypeError("Data to be indexed must be a string.")
+        return hmac.new(self.key, data.lower().encode('utf-8'), 'sha256').digest()
+
     def decrypt(self, encrypted_data: bytes) -> str:
         """
         Decrypts bytes back into a string.
@@ -46,8 +95,4 @@ class EncryptionManager:
         """
         if not isinstance(encrypted_data, bytes):
             raise TypeError("Data to be decrypted must be bytes.")
-        try:
-            decrypted_data = self.cipher.decrypt(encrypted_data)
-            return decrypted_data.decode('utf-8')
-        except InvalidToken:
-            return ""
\ No newline at end of file
+        return self._decrypt_cached(encrypted_data)
\ No newline at end of file
@@ -1,5 +1,6 @@
 # src/logger.py
 
+import atexit
 from datetime import datetime
 import database, config
 from encryption import EncryptionManager
@@ -13,35 +14,58 @@ from encryption import EncryptionManager
 
 
 class SecureLogger:
+    # Number of buffered entries before a flush is forced.
+    FLUSH_THRESHOLD = 32
+
     def __init__(self, encryption_manager: EncryptionManager):
         self.encryption_manager = encryption_manager
+        self._buffer = []
+        # Bumped on every suspicious entry; lets the alert check skip its
+        # COUNT query when nothing suspicious was logged since the last one.
+        self.suspicious_seq = 0
+        atexit.register(self.flush)
 
     def log(self, username: str, activity_desc: str, additional_info: str = "", is_suspicious: bool = False):
         """
-        Creates a formatted log entry, encrypts it, and saves it to the database.
+        Creates a formatted log entry and buffers it for writing.
+        Nothing is encrypted here: the interactive path only appends a tuple,
+        and flush() encrypts the whole batch at once. Suspicious entries are
+        flushed immediately so alerts are never delayed.
         """
-        now = datetime.now()
-        date = now.strftime("%Y-%m-%d")
-        time = now.strftime("%H:%M:%S")
-        
-        # Encrypt log data
-        encrypted_username = self.encryption_manager.encrypt(username)
-        encrypted_activity_desc = self.encryption_manager.encrypt(activity_desc)
-        encrypted_additional_info = self.encryption_manager.encrypt(additional_info)
+        # One isoformat() call instead of two strftime format-string parses.
+        date, time = datetime.now().isoformat(sep=" ", timespec="seconds").split(" ")
 
+        self._buffer.append(
+            (date, time, username, activity_desc, additional_info, 1 if is_suspicious else 0)
+        )
+        if is_suspicious:
+            self.suspicious_seq += 1
+            self.flush()
+        elif len(self._buffer) >= self.FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self):
+        """Encrypts and writes all buffered log entries in one transaction."""
+        if not self._buffer:
+            return
+        rows = []
+        for date, time, username, activity_desc, additional_info, suspicious in self._buffer:
+            encrypted = self.encryption_manager.encrypt_many([username, activity_desc, additional_info])
+            rows.append((date, time, encrypted[0], encrypted[1], encrypted[2], suspicious, 0))
         conn = database.get_db_connection()
         cursor = conn.cursor()
-        cursor.execute(
+        cursor.executemany(
             "INSERT INTO logs (date, time, username, description_of_activity, additional_information, suspicious, is_read) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (date, time, encrypted_username, encrypted_activity_desc, encrypted_additional_info, 1 if is_suspicious else 0, 0)
+            rows
         )
         conn.commit()
-        conn.close()
+        self._buffer.clear()
 
     def get_logs(self, limit: int = 100) -> list[dict]:
         """
         Retrieves and decrypts the most recent log entries.
         """
+        self.flush()  # Make sure buffered entries are visible to the query.
         conn = database.get_db_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM logs ORDER BY id DESC LIMIT ?", (limit,))
@@ -60,6 +84,5 @@ class SecureLogger:
                 "is_read": "Yes" if row["is_read"] == 1 else ""
             }
             decrypted_logs.append(decrypted_log)
-            
-        conn.close()
+
         return decrypted_logs
\ No newline at end of file
@@ -3,7 +3,11 @@
 from dataclasses import dataclass
 from datetime import datetime
 
-@dataclass
+# slots=True drops the per-instance __dict__, halving instance size and making
+# attribute access an offset load; it matters when search results materialize
+# thousands of these. Not frozen: User is updated in place after profile edits.
+
+@dataclass(slots=True)
 class User:
     id: int
     username: str
@@ -12,7 +16,7 @@ class User:
     last_name: str
     registration_date: str
 
-@dataclass
+@dataclass(slots=True)
 class Traveller:
     id: int
     first_name: str
@@ -28,7 +32,7 @@ class Traveller:
     driving_license_number: str
     registration_date: str
 
-@dataclass
+@dataclass(slots=True)
 class Scooter:
     id: int
     serial_number: str
@@ -46,7 +50,7 @@ class Scooter:
     mileage: int
     last_maintenance_date: str
 
-@dataclass
+@dataclass(slots=True)
 class Log:
     id: int
     date: str
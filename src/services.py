@@ -1,12 +1,15 @@
 # src/services.py
 
+import functools
+import json
 import sqlite3
 import zipfile
 import shutil
 import os
 import secrets
 import string
-from datetime import datetime
+import time
+from datetime import date, datetime
 import database, config, models, auth, validation
 from encryption import EncryptionManager
 from logger import SecureLogger
@@ -15,13 +18,60 @@ from logger import SecureLogger
 encryption_manager = EncryptionManager(config.ENCRYPTION_KEY_FILE)
 secure_logger = SecureLogger(encryption_manager)
 
+# All service functions share the persistent connection owned by the database
+# module. Writes run inside "with conn:" blocks so they commit on success and
+# roll back on error; nothing here closes the connection.
+
+# Insert statements are module constants so every call passes the identical
+# string to sqlite3, keeping the per-connection prepared-statement cache warm.
+_SQL_INSERT_USER = (
+    "INSERT INTO users (username, password_hash, role, first_name, last_name, registration_date, username_bi) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_TRAVELLER = (
+    "INSERT INTO travellers (first_name, last_name, birthday, gender, street_name, house_number, "
+    "zip_code, city, email, mobile_phone, driving_license_number, registration_date, "
+    "email_bi, phone_bi, license_bi, zip_bi, house_bi) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_SCOOTER = (
+    "INSERT INTO scooters (serial_number, brand, model, in_service_date, top_speed, "
+    "battery_capacity, state_of_charge, target_range_soc_min, target_range_soc_max, "
+    "location_lat, location_lon, out_of_service_status, mileage, last_maintenance_date, "
+    "serial_bi, brand_bi, model_bi) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+# Stable UPDATE text for the two-field profile updates: absent fields arrive
+# as NULL and COALESCE keeps the stored value, so partial updates reuse one
+# cached prepared statement instead of parsing a freshly built SET clause.
+_SQL_UPDATE_USER_NAMES = (
+    "UPDATE users SET first_name = COALESCE(?, first_name), "
+    "last_name = COALESCE(?, last_name) WHERE id = ?"
+)
+
+
+# Built once: reset_user_password rebuilt this 94-character alphabet from the
+# string-module pieces on every call.
+_PW_ALPHABET = string.ascii_letters + string.digits + string.punctuation
+
+
+def _today_iso() -> str:
+    """Today's date as YYYY-MM-DD; isoformat() skips the strftime format parse."""
+    return date.today().isoformat()
+
 
 # --- Authorization Decorator ---
 def requires_role(allowed_roles: list[str]):
     """A decorator to enforce role-based access control on service functions."""
+    # Frozen once at decoration time: the check in the wrapper runs on every
+    # menu action, and a frozenset membership test is a single hash lookup.
+    allowed = frozenset(allowed_roles)
+
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(current_user: models.User, *args, **kwargs):
-            if not current_user or current_user.role not in allowed_roles:
+            if not current_user or current_user.role not in allowed:
                 print(f"Access Denied. Your role '{current_user.role if current_user else 'None'}' is not authorized.")
                 if current_user:
                     secure_logger.log(current_user.username, "Authorization failed", f"Attempted to use {func.__name__}", is_suspicious=True)
@@ -31,13 +81,48 @@ def requires_role(allowed_roles: list[str]):
     return decorator
 
 # --- User Services ---
+
+# Username lookups resolve through the username_bi blind-index column (an
+# indexed point query); resolved rows are still cached for a short TTL. Any
+# write to the users table (or a restore) clears the cache rather than trying
+# to patch individual entries.
+_USER_CACHE_TTL_SECONDS = 300
+_user_cache: dict[str, tuple[sqlite3.Row, float]] = {}
+
+def _invalidate_user_cache():
+    """Drops all cached user lookups after a users-table write."""
+    _user_cache.clear()
+
 def _find_user_by_username(username: str) -> sqlite3.Row | None:
-    """Finds a user by their plaintext username by decrypting all usernames."""
-    all_users = get_all_users_raw()
-    for user_row in all_users:
+    """Finds a user by their plaintext username via the username blind index."""
+    cache_key = username.lower()
+    cached = _user_cache.get(cache_key)
+    if cached is not None:
+        user_row, cached_at = cached
+        if time.time() - cached_at < _USER_CACHE_TTL_SECONDS:
+            return user_row
+        del _user_cache[cache_key]
+
+    # blind_index lowercases its input, so the point query is as
+    # case-insensitive as the decrypt-and-compare scan it replaced.
+    conn = database.get_db_connection()
+    cursor = conn.execute(
+        "SELECT * FROM users WHERE username_bi = ?",
+        (encryption_manager.blind_index(username),)
+    )
+    user_row = cursor.fetchone()
+    if user_row is not None:
+        _user_cache[cache_key] = (user_row, time.time())
+        return user_row
+
+    # Rows restored from a pre-index backup have no digest yet; fall back to
+    # a decrypt scan over just those rows, streamed so the first match stops
+    # the remaining decrypts.
+    for user_row in conn.execute("SELECT * FROM users WHERE username_bi IS NULL"):
         try:
             decrypted_username = encryption_manager.decrypt(user_row['username'])
-            if decrypted_username.lower() == username.lower():
+            if decrypted_username.lower() == cache_key:
+                _user_cache[cache_key] = (user_row, time.time())
                 return user_row
         except Exception:
             continue
@@ -46,11 +131,7 @@ def _find_user_by_username(username: str) -> sqlite3.Row | None:
 def get_all_users_raw() -> list[sqlite3.Row]:
     """Retrieves all user records from the database with encrypted data."""
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users")
-    users = cursor.fetchall()
-    conn.close()
-    return users
+    return conn.execute("SELECT * FROM users").fetchall()
 
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
 def add_new_user(current_user: models.User, username, password, role, first_name, last_name):
@@ -71,55 +152,66 @@ def add_new_user(current_user: models.User, username, password, role, first_name
     if current_user.role == config.ROLE_SYSTEM_ADMIN and role == config.ROLE_SYSTEM_ADMIN:
         print("System administrators cannot create other system administrators.")
         return False
-    
+
+    # Duplicate check through the username blind index: one point query up
+    # front instead of inserting and unwinding an IntegrityError. The UNIQUE
+    # constraint on the encrypted username cannot catch duplicates anyway,
+    # because Fernet produces a different ciphertext for the same plaintext.
+    if _find_user_by_username(username) is not None:
+        print(f"Error: Username '{username}' already exists.")
+        return False
+
     try:
         # 2. Encrypt username and names
         encrypted_username = encryption_manager.encrypt(username)
         encrypted_first_name = encryption_manager.encrypt(first_name)
         encrypted_last_name = encryption_manager.encrypt(last_name)
-        
+
         # 3. Hash password
         password_hash = auth.hash_password(password)
-        
+
         # 4. Insert into DB
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (username, password_hash, role, first_name, last_name, registration_date) VALUES (?, ?, ?, ?, ?, ?)",
-            (encrypted_username, password_hash, role, encrypted_first_name, encrypted_last_name, datetime.now().strftime("%Y-%m-%d"))
-        )
-        conn.commit()
-        
+        with conn:
+            conn.execute(
+                _SQL_INSERT_USER,
+                (encrypted_username, password_hash, role, encrypted_first_name, encrypted_last_name, _today_iso(),
+                 encryption_manager.blind_index(username))
+            )
+
+        _invalidate_user_cache()
+
         # 5. Log the action
         secure_logger.log(current_user.username, "Added new user", f"Username: {username}, Role: {role}")
         print("User added successfully.")
         return True
-    except sqlite3.IntegrityError:
-        print(f"Error: Username '{username}' already exists.")
-        return False
     except Exception as e:
         print(f"An error occurred: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
 
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
-def update_user_profile(current_user: models.User, target_username: str, new_profile_data: dict):
-    """Updates a user's first and last name, enforcing role hierarchy."""
-    target_user_record = _find_user_by_username(target_username)
-    if not target_user_record:
-        print(f"Error: User '{target_username}' not found.")
-        return False
-
-    target_user_role = target_user_record['role']
-    encrypted_target_username = target_user_record['username']
+def update_user_profile(current_user: models.User, target_username: str, new_profile_data: dict, prefetched_user: models.User = None):
+    """
+    Updates a user's first and last name, enforcing role hierarchy.
+    Callers that already looked the target up can pass it as prefetched_user
+    to skip a second decrypt-all lookup.
+    """
+    if prefetched_user is not None:
+        target_user_role = prefetched_user.role
+        target_user_id = prefetched_user.id
+    else:
+        target_user_record = _find_user_by_username(target_username)
+        if not target_user_record:
+            print(f"Error: User '{target_username}' not found.")
+            return False
+        target_user_role = target_user_record['role']
+        target_user_id = target_user_record['id']
 
     if current_user.role == config.ROLE_SYSTEM_ADMIN and target_user_role != config.ROLE_SERVICE_ENGINEER:
         print("System Admins can only update Service Engineer profiles.")
         secure_logger.log(current_user.username, "Authorization failed", f"Attempted to update profile of {target_username} ({target_user_role})", is_suspicious=True)
         return False
-    
+
     if not new_profile_data or not any(new_profile_data.values()):
         print("No new data provided for update.")
         return False
@@ -134,76 +226,72 @@ def update_user_profile(current_user: models.User, target_username: str, new_pro
         print("No valid fields to update.")
         return False
 
-    set_clause = ", ".join([f"{key} = ?" for key in update_fields.keys()])
-    params = list(update_fields.values()) + [encrypted_target_username]
-
     try:
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            f"UPDATE users SET {set_clause} WHERE username = ?",
-            tuple(params)
-        )
-        
-        if cursor.rowcount == 0:
-            print(f"Error: User '{target_username}' not found during update.")
-            return False
-            
-        conn.commit()
+        with conn:
+            cursor = conn.execute(
+                _SQL_UPDATE_USER_NAMES,
+                (update_fields.get('first_name'), update_fields.get('last_name'), target_user_id)
+            )
+            if cursor.rowcount == 0:
+                print(f"Error: User '{target_username}' not found during update.")
+                return False
+
+        _invalidate_user_cache()
         secure_logger.log(current_user.username, "Updated user profile", f"Target Username: {target_username}")
         print("User profile updated successfully.")
         return True
     except Exception as e:
         print(f"An error occurred while updating user profile: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
 
 
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
-def delete_user(current_user: models.User, target_username: str):
-    """Deletes a user from the system, enforcing role hierarchy."""
+def delete_user(current_user: models.User, target_username: str, prefetched_user: models.User = None):
+    """
+    Deletes a user from the system, enforcing role hierarchy.
+    Callers that already looked the target up can pass it as prefetched_user
+    to skip a second decrypt-all lookup.
+    """
     if current_user.username.lower() == target_username.lower():
         print("Error: You cannot delete your own account this way.")
         return False
 
-    target_user_record = _find_user_by_username(target_username)
-    if not target_user_record:
-        print(f"Error: User '{target_username}' not found.")
-        return False
-
-    target_user_role = target_user_record['role']
-    encrypted_target_username = target_user_record['username']
+    if prefetched_user is not None:
+        target_user_role = prefetched_user.role
+        target_user_id = prefetched_user.id
+    else:
+        target_user_record = _find_user_by_username(target_username)
+        if not target_user_record:
+            print(f"Error: User '{target_username}' not found.")
+            return False
+        target_user_role = target_user_record['role']
+        target_user_id = target_user_record['id']
 
     if current_user.role == config.ROLE_SYSTEM_ADMIN and target_user_role != config.ROLE_SERVICE_ENGINEER:
         print("System Admins can only delete Service Engineers.")
         secure_logger.log(current_user.username, "Authorization failed", f"Attempted to delete user {target_username} ({target_user_role})", is_suspicious=True)
         return False
-    
+
     if current_user.role == config.ROLE_SUPER_ADMIN and target_user_role == config.ROLE_SUPER_ADMIN:
         print("Error: Super Admins cannot delete other Super Admins.")
         return False
 
     try:
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM users WHERE username = ?", (encrypted_target_username,))
-        
-        if cursor.rowcount == 0:
-            print(f"Error: User '{target_username}' not found during deletion.")
-            return False
-            
-        conn.commit()
+        with conn:
+            cursor = conn.execute("DELETE FROM users WHERE id = ?", (target_user_id,))
+            if cursor.rowcount == 0:
+                print(f"Error: User '{target_username}' not found during deletion.")
+                return False
+
+        _invalidate_user_cache()
         secure_logger.log(current_user.username, "Deleted user", f"Target Username: {target_username}", is_suspicious=True)
         print(f"User '{target_username}' deleted successfully.")
         return True
     except Exception as e:
         print(f"An error occurred while deleting user: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
 
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
 def reset_user_password(current_user: models.User, target_username: str):
@@ -215,23 +303,20 @@ def reset_user_password(current_user: models.User, target_username: str):
         return False
 
     encrypted_target_username = target_user_record['username']
-    
+
     # Generate a secure temporary password
-    alphabet = string.ascii_letters + string.digits + string.punctuation
-    temp_password = ''.join(secrets.choice(alphabet) for i in range(14))
-    
+    temp_password = ''.join(secrets.choice(_PW_ALPHABET) for i in range(14))
+
     new_password_hash = auth.hash_password(temp_password)
-    
+
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE users SET password_hash = ? WHERE username = ?",
-        (new_password_hash, encrypted_target_username)
-    )
-    
-    conn.commit()
-    conn.close()
-    
+    with conn:
+        conn.execute(
+            "UPDATE users SET password_hash = ? WHERE username = ?",
+            (new_password_hash, encrypted_target_username)
+        )
+
+    _invalidate_user_cache()
     secure_logger.log(current_user.username, "Reset user password", f"Target Username: {target_username}", is_suspicious=True)
     print(f"Password for user '{target_username}' has been reset.")
     print(f"New Temporary Password: {temp_password}")
@@ -245,24 +330,23 @@ def update_own_password(current_user: models.User, old_password: str, new_passwo
         return False
 
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT password_hash FROM users WHERE id = ?", (current_user.id,))
-    user_row = cursor.fetchone()
+    user_row = conn.execute(
+        "SELECT password_hash FROM users WHERE id = ?", (current_user.id,)
+    ).fetchone()
 
     if not user_row or not auth.verify_password(old_password, user_row['password_hash']):
         print("Incorrect old password.")
-        conn.close()
         secure_logger.log(current_user.username, "Failed password change", "Incorrect old password", is_suspicious=True)
         return False
-        
+
     new_password_hash = auth.hash_password(new_password)
-    cursor.execute(
-        "UPDATE users SET password_hash = ? WHERE id = ?",
-        (new_password_hash, current_user.id)
-    )
-    conn.commit()
-    conn.close()
-    
+    with conn:
+        conn.execute(
+            "UPDATE users SET password_hash = ? WHERE id = ?",
+            (new_password_hash, current_user.id)
+        )
+
+    _invalidate_user_cache()
     secure_logger.log(current_user.username, "Changed own password")
     print("Password updated successfully.")
     return True
@@ -301,14 +385,14 @@ def update_own_profile(current_user: models.User, new_profile_data: dict):
         print("No valid fields to update.")
         return False
 
-    set_clause = ", ".join([f"{key} = ?" for key in update_fields.keys()])
-    params = list(update_fields.values()) + [current_user.id]
-
     try:
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"UPDATE users SET {set_clause} WHERE id = ?", tuple(params))
-        conn.commit()
+        with conn:
+            conn.execute(
+                _SQL_UPDATE_USER_NAMES,
+                (update_fields.get('first_name'), update_fields.get('last_name'), current_user.id)
+            )
+        _invalidate_user_cache()
         secure_logger.log(current_user.username, "Updated own profile", f"Fields updated: {list(update_fields.keys())}")
         print("Profile updated successfully.")
         if 'first_name' in new_profile_data:
@@ -319,9 +403,6 @@ def update_own_profile(current_user: models.User, new_profile_data: dict):
     except Exception as e:
         print(f"An error occurred while updating your profile: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
 
 @requires_role([config.ROLE_SYSTEM_ADMIN])
 def delete_own_account(current_user: models.User):
@@ -332,11 +413,11 @@ def delete_own_account(current_user: models.User):
 
     try:
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM users WHERE id = ?", (current_user.id,))
-        conn.commit()
+        with conn:
+            cursor = conn.execute("DELETE FROM users WHERE id = ?", (current_user.id,))
 
         if cursor.rowcount > 0:
+            _invalidate_user_cache()
             secure_logger.log(current_user.username, "Deleted own account", f"Username: {current_user.username}", is_suspicious=True)
             return True
         else:
@@ -345,29 +426,29 @@ def delete_own_account(current_user: models.User):
     except Exception as e:
         print(f"An error occurred while deleting your account: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
 
 # --- Scooter Services ---
 
-@requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
-def add_new_scooter(current_user: models.User, serial_number: str, brand: str, model: str, top_speed: int, battery_capacity: int, state_of_charge: int, target_range_soc_min: int, target_range_soc_max: int, location_lat: str, location_lon: str, mileage: int, last_maintenance_date: str, out_of_service_status: bool = False):
-    """Adds a new scooter to the fleet."""
+def _scooter_validation_error(serial_number, location_lat, location_lon, last_maintenance_date) -> str | None:
+    """Returns an error message for the first invalid scooter field, or None."""
     if not validation.is_valid_scooter_serial(serial_number):
-        print("Invalid scooter serial number format. Must be 10 to 17 alphanumeric characters.")
-        return False
+        return "Invalid scooter serial number format. Must be 10 to 17 alphanumeric characters."
     if not validation.is_valid_location_coordinate(location_lat):
-        print("Invalid latitude format. Must have at least 5 decimal places (e.g., 51.92250 between 51.8 and 52.0).")
-        return False
+        return "Invalid latitude format. Must have at least 5 decimal places (e.g., 51.92250 between 51.8 and 52.0)."
     if not validation.is_valid_location_coordinate(location_lon):
-        print("Invalid longitude format. Must have at least 5 decimal places (e.g., 4.47917) between 4.3, 4.6.")
-        return False
+        return "Invalid longitude format. Must have at least 5 decimal places (e.g., 4.47917) between 4.3, 4.6."
     if not validation.is_in_rotterdam_region(float(location_lat), float(location_lon)):
-        print("Location is outside of the Rotterdam region.")
-        return False
+        return "Location is outside of the Rotterdam region."
     if not validation.is_valid_iso_date(last_maintenance_date):
-        print("Invalid date format. Must be YYYY-MM-DD.")
+        return "Invalid date format. Must be YYYY-MM-DD."
+    return None
+
+@requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
+def add_new_scooter(current_user: models.User, serial_number: str, brand: str, model: str, top_speed: int, battery_capacity: int, state_of_charge: int, target_range_soc_min: int, target_range_soc_max: int, location_lat: str, location_lon: str, mileage: int, last_maintenance_date: str, out_of_service_status: bool = False):
+    """Adds a new scooter to the fleet."""
+    error = _scooter_validation_error(serial_number, location_lat, location_lon, last_maintenance_date)
+    if error:
+        print(error)
         return False
 
     try:
@@ -380,24 +461,37 @@ def add_new_scooter(current_user: models.User, serial_number: str, brand: str, m
             'last_maintenance_date': last_maintenance_date,
             'out_of_service_status': out_of_service_status
         }
-        encrypted_data = {key: encryption_manager.encrypt(str(value)) for key, value in scooter_data.items()}
+        encrypted_data = dict(zip(
+            scooter_data.keys(),
+            encryption_manager.encrypt_many([value if isinstance(value, str) else str(value) for value in scooter_data.values()])
+        ))
 
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-        in_service_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute(
-            "INSERT INTO scooters (serial_number, brand, model, in_service_date, top_speed, battery_capacity, state_of_charge, target_range_soc_min, target_range_soc_max, location_lat, location_lon, out_of_service_status, mileage, last_maintenance_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                encrypted_data['serial_number'], encrypted_data['brand'], encrypted_data['model'],
-                in_service_date, encrypted_data.get('top_speed'),
-                encrypted_data.get('battery_capacity'), encrypted_data.get('state_of_charge'),
-                encrypted_data.get('target_range_soc_min'), encrypted_data.get('target_range_soc_max'),
-                encrypted_data.get('location_lat'), encrypted_data.get('location_lon'),
-                encrypted_data.get('out_of_service_status'),
-                encrypted_data.get('mileage'), encrypted_data.get('last_maintenance_date')
+        in_service_date = datetime.now().isoformat(sep=" ", timespec="seconds")
+        with conn:
+            cursor = conn.execute(
+                _SQL_INSERT_SCOOTER + " RETURNING id",
+                (
+                    encrypted_data['serial_number'], encrypted_data['brand'], encrypted_data['model'],
+                    in_service_date, encrypted_data.get('top_speed'),
+                    encrypted_data.get('battery_capacity'), encrypted_data.get('state_of_charge'),
+                    encrypted_data.get('target_range_soc_min'), encrypted_data.get('target_range_soc_max'),
+                    encrypted_data.get('location_lat'), encrypted_data.get('location_lon'),
+                    encrypted_data.get('out_of_service_status'),
+                    encrypted_data.get('mileage'), encrypted_data.get('last_maintenance_date'),
+                    encryption_manager.blind_index(serial_number),
+                    encryption_manager.blind_index(brand),
+                    encryption_manager.blind_index(model)
+                )
             )
-        )
-        conn.commit()
+            new_id = cursor.fetchone()['id']
+            _index_scooter_tokens(conn, new_id, [serial_number, brand, model])
+
+        # RETURNING gives us the new id without a second statement, so the
+        # search cache can be extended in place instead of thrown away.
+        cached_text = _search_text_cache['scooters']
+        if cached_text is not None:
+            cached_text[new_id] = f"{brand}\n{model}\n{serial_number}".lower()
         secure_logger.log(current_user.username, "Added new scooter", f"Serial: {serial_number}")
         print("Scooter added successfully.")
         return True
@@ -407,31 +501,38 @@ def add_new_scooter(current_user: models.User, serial_number: str, brand: str, m
     except Exception as e:
         print(f"An error occurred while adding the scooter: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN, config.ROLE_SERVICE_ENGINEER])
 def get_scooter_details(current_user: models.User, scooter_id: int) -> dict | None:
     """Retrieves and decrypts all details for a single scooter by its ID."""
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM scooters WHERE id = ?", (scooter_id,))
-    scooter_row = cursor.fetchone()
-    conn.close()
+    scooter_row = conn.execute("SELECT * FROM scooters WHERE id = ?", (scooter_id,)).fetchone()
 
     if not scooter_row:
         print(f"Error: Scooter with ID '{scooter_id}' not found.")
         return None
 
     try:
-        decrypted_row = {key: (encryption_manager.decrypt(value) if isinstance(value, bytes) else value) for key, value in dict(scooter_row).items()}
-        return decrypted_row
+        return _decrypt_result_row(scooter_row)
     except Exception as e:
         print(f"An error occurred during scooter data decryption: {e}")
         secure_logger.log(current_user.username, "Decryption failed", f"Failed to decrypt data for scooter ID {scooter_id}", is_suspicious=True)
         return None
 
+# Field -> (validator, error message) for the scooter fields with format
+# rules; update_scooter runs validators only for the fields actually present
+# in the update instead of walking a chain of per-field branches.
+_SCOOTER_UPDATE_VALIDATORS = {
+    'location_lat': (validation.is_valid_location_coordinate,
+                     "Invalid format for location_lat. Must have at least 5 decimal places."),
+    'location_lon': (validation.is_valid_location_coordinate,
+                     "Invalid format for location_lon. Must have at least 5 decimal places."),
+    'last_maintenance_date': (validation.is_valid_iso_date,
+                              "Invalid date format for last_maintenance_date. Must be YYYY-MM-DD."),
+    'serial_number': (validation.is_valid_scooter_serial,
+                      "Invalid format for serial_number. Must be 10 to 17 alphanumeric characters."),
+}
+
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN, config.ROLE_SERVICE_ENGINEER])
 def update_scooter(current_user: models.User, scooter_id: int, updates: dict):
     """Updates a scooter's information based on the user's role."""
@@ -447,14 +548,9 @@ def update_scooter(current_user: models.User, scooter_id: int, updates: dict):
     # Filter the updates dictionary to only include editable fields
     for key, value in updates.items():
         if key in editable_fields:
-            if key in ['location_lat', 'location_lon'] and not validation.is_valid_location_coordinate(value):
-                print(f"Invalid format for {key}. Must have at least 5 decimal places.")
-                return False
-            if key == 'last_maintenance_date' and not validation.is_valid_iso_date(value):
-                print(f"Invalid date format for {key}. Must be YYYY-MM-DD.")
-                return False
-            if key == 'serial_number' and not validation.is_valid_scooter_serial(value):
-                print(f"Invalid format for {key}. Must be 10 to 17 alphanumeric characters.")
+            entry = _SCOOTER_UPDATE_VALIDATORS.get(key)
+            if entry is not None and not entry[0](value):
+                print(entry[1])
                 return False
             allowed_updates[key] = value
         else:
@@ -464,182 +560,338 @@ def update_scooter(current_user: models.User, scooter_id: int, updates: dict):
         print("No valid fields to update or all updates were unauthorized.")
         return False
 
-    encrypted_updates = {key: encryption_manager.encrypt(str(value)) for key, value in allowed_updates.items()}
+    conn = database.get_db_connection()
+    current_row = conn.execute("SELECT * FROM scooters WHERE id = ?", (scooter_id,)).fetchone()
+    if current_row is None:
+        print(f"Error: Scooter with ID '{scooter_id}' not found.")
+        return False
+
+    # Telemetry-style callers resend unchanged values (state-of-charge
+    # heartbeats); dropping fields that already hold the new value skips
+    # their re-encryption, and when nothing remains the WAL write and its
+    # fsync are skipped entirely. The stored-value decrypts hit the LRU.
+    for key in list(allowed_updates):
+        stored = current_row[key]
+        if (isinstance(stored, bytes)
+                and encryption_manager.decrypt(stored) == str(allowed_updates[key])):
+            del allowed_updates[key]
+    if not allowed_updates:
+        print("Scooter updated successfully.")
+        return True
 
-    # SQL query
-    set_clause = ", ".join([f"{key} = ?" for key in encrypted_updates.keys()])
-    sql_query = f"UPDATE scooters SET {set_clause} WHERE id = ?"
-    params = list(encrypted_updates.values()) + [scooter_id]
+    encrypted_updates = {key: encryption_manager.encrypt(value if isinstance(value, str) else str(value)) for key, value in allowed_updates.items()}
+    for field, bi_column in _SCOOTER_BLIND_FIELDS.items():
+        if field in allowed_updates:
+            encrypted_updates[bi_column] = encryption_manager.blind_index(str(allowed_updates[field]))
+
+    # Absent columns pass NULL into the canonical COALESCE statement and
+    # keep their stored value.
+    params = [encrypted_updates.get(column) for column in _SCOOTER_UPDATE_COLUMNS]
+    params.append(scooter_id)
 
     try:
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-
-        if cursor.rowcount == 0:
-            print(f"Error: Scooter with ID '{scooter_id}' not found.")
-            return False
-
-        conn.commit()
+        with conn:
+            cursor = conn.execute(_SQL_UPDATE_SCOOTER, params)
+            if cursor.rowcount == 0:
+                print(f"Error: Scooter with ID '{scooter_id}' not found.")
+                return False
+            if any(field in allowed_updates for field in _SCOOTER_TOKEN_FIELDS):
+                row = conn.execute(
+                    "SELECT serial_number, brand, model FROM scooters WHERE id = ?",
+                    (scooter_id,)
+                ).fetchone()
+                _reindex_scooter(
+                    conn, scooter_id,
+                    [encryption_manager.decrypt(row[field]) for field in _SCOOTER_TOKEN_FIELDS]
+                )
+
+        _invalidate_search_cache('scooters')
         secure_logger.log(current_user.username, "Updated scooter", f"ID: {scooter_id}, Updates: {allowed_updates}")
         print("Scooter updated successfully.")
         return True
     except Exception as e:
         print(f"An error occurred while updating the scooter: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
+
+@requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN, config.ROLE_SERVICE_ENGINEER])
+def update_scooter_locations_bulk(current_user: models.User, updates: list[tuple[int, str, str]]):
+    """
+    Updates the GPS location of many scooters in one transaction.
+    Takes (scooter_id, location_lat, location_lon) tuples, validates every
+    coordinate pair up front, then applies all updates with one executemany
+    under a single commit — the telemetry-ingestion counterpart of the bulk
+    insert paths. Rejects the whole batch if any row is invalid.
+    """
+    if not updates:
+        print("No location updates to apply.")
+        return False
+
+    for index, (scooter_id, location_lat, location_lon) in enumerate(updates):
+        if (not validation.is_valid_location_coordinate(location_lat)
+                or not validation.is_valid_location_coordinate(location_lon)):
+            print(f"Row {index + 1}: Invalid coordinate format. Must have at least 5 decimal places.")
+            return False
+        if not validation.is_in_rotterdam_region(float(location_lat), float(location_lon)):
+            print(f"Row {index + 1}: Location is outside of the Rotterdam region.")
+            return False
+
+    encrypted_updates = [
+        (encryption_manager.encrypt(str(location_lat)),
+         encryption_manager.encrypt(str(location_lon)),
+         scooter_id)
+        for scooter_id, location_lat, location_lon in updates
+    ]
+
+    try:
+        conn = database.get_db_connection()
+        with conn:
+            conn.executemany(
+                "UPDATE scooters SET location_lat = ?, location_lon = ? WHERE id = ?",
+                encrypted_updates
+            )
+        # Locations are not part of the searchable text, so the scooter
+        # search cache stays valid.
+        secure_logger.log(current_user.username, "Updated scooter locations in bulk", f"Count: {len(updates)}")
+        print(f"{len(updates)} scooter locations updated successfully.")
+        return True
+    except Exception as e:
+        print(f"An error occurred while updating scooter locations: {e}")
+        return False
 
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
 def delete_scooter(current_user: models.User, scooter_id: int):
     """Deletes a scooter from the system by its ID."""
     try:
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT serial_number FROM scooters WHERE id = ?", (scooter_id,))
-        scooter_row = cursor.fetchone()
+        with conn:
+            # RETURNING folds the lookup for the log message into the delete
+            # itself: one statement, one B-tree walk, and no window between
+            # checking the row and removing it.
+            scooter_row = conn.execute(
+                "DELETE FROM scooters WHERE id = ? RETURNING serial_number",
+                (scooter_id,)
+            ).fetchone()
+            if scooter_row is None:
+                print(f"Error: Scooter with ID '{scooter_id}' not found.")
+                return False
+            conn.execute("DELETE FROM scooter_search_index WHERE scooter_id = ?", (scooter_id,))
 
-        if scooter_row is None:
-            print(f"Error: Scooter with ID '{scooter_id}' not found.")
-            conn.close()
-            return False
-        
         serial_number_for_log = f"ID: {scooter_id}"
         try:
             serial_number_for_log = encryption_manager.decrypt(scooter_row['serial_number'])
         except Exception:
-            pass 
-
-        cursor.execute("DELETE FROM scooters WHERE id = ?", (scooter_id,))
+            pass
 
-        if cursor.rowcount == 0:
-            print(f"Error: Scooter with ID '{scooter_id}' not found during deletion.")
-            conn.close()
-            return False
-
-        conn.commit()
+        _invalidate_search_cache('scooters')
         secure_logger.log(current_user.username, "Deleted scooter", f"Scooter ID: {scooter_id}, Serial: {serial_number_for_log}", is_suspicious=True)
         print(f"Scooter with ID '{scooter_id}' deleted successfully.")
         return True
     except Exception as e:
         print(f"An error occurred while deleting the scooter: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
 
 
+# Searchable encrypted field -> blind-index column holding its HMAC digest.
+_SCOOTER_BLIND_FIELDS = {'serial_number': 'serial_bi', 'brand': 'brand_bi', 'model': 'model_bi'}
+_TRAVELLER_BLIND_FIELDS = {'email': 'email_bi', 'mobile_phone': 'phone_bi',
+                           'driving_license_number': 'license_bi',
+                           'zip_code': 'zip_bi', 'house_number': 'house_bi'}
+
+# Partial (substring) searches cannot use the blind indexes, so the decrypted
+# searchable text of each table is cached in memory after the first full scan:
+# id -> newline-joined lowercased field values. Plaintext never reaches disk;
+# the cache lives only for the session and is dropped on any table write.
+_search_text_cache: dict[str, dict[int, str] | None] = {'travellers': None, 'scooters': None}
+
+def _invalidate_search_cache(table: str):
+    """Drops the cached searchable text for a table after a write."""
+    _search_text_cache[table] = None
+
+def _fetch_decrypted_by_ids(table: str, row_ids: list[int]) -> list[dict]:
+    """Fetches and decrypts only the rows with the given ids."""
+    if not row_ids:
+        return []
+    conn = database.get_db_connection()
+    placeholders = ', '.join('?' for _ in row_ids)
+    cursor = conn.execute(f"SELECT * FROM {table} WHERE id IN ({placeholders})", row_ids)
+    results = []
+    for row in cursor.fetchall():
+        try:
+            results.append(_decrypt_result_row(row))
+        except Exception:
+            continue
+    return results
+
+def _decrypt_result_row(row: sqlite3.Row) -> dict:
+    """Decrypts an encrypted row into a plaintext dict, dropping blind-index columns."""
+    items = [(key, value) for key, value in dict(row).items() if not key.endswith('_bi')]
+    encrypted = [value for _, value in items if isinstance(value, bytes)]
+    decrypted = iter(encryption_manager.decrypt_many(encrypted))
+    return {
+        key: (next(decrypted) if isinstance(value, bytes) else value)
+        for key, value in items
+    }
+
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN, config.ROLE_SERVICE_ENGINEER])
 def search_scooters(current_user: models.User, search_key: str):
     """
-    Searches for scooters by a partial key.
-    NOTE: This is computationally expensive as it decrypts all records in memory.
+    Searches for scooters by serial number, brand or model.
+    Exact matches resolve through the blind-index columns without touching
+    the ciphertext; only partial keys fall back to the full decrypt scan.
     """
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM scooters")
-    all_scooters = cursor.fetchall()
-    conn.close()
 
-    results = []
-    search_key_lower = search_key.lower()
+    digest = encryption_manager.blind_index(search_key)
+    exact_matches = conn.execute(
+        "SELECT * FROM scooters WHERE serial_bi = ? OR brand_bi = ? OR model_bi = ?",
+        (digest, digest, digest)
+    ).fetchall()
+    if exact_matches:
+        results = []
+        for row in exact_matches:
+            try:
+                results.append(_decrypt_result_row(row))
+            except Exception:
+                continue
+        return results
 
+    search_key_lower = search_key.lower()
     searchable_fields = ['brand', 'model', 'serial_number']
 
-    for row in all_scooters:
+    # Partial keys of three or more characters resolve via the trigram token
+    # index, as in search_travellers. Every searchable scooter field is
+    # tokenized, so the candidate set is complete and no fall-through scan
+    # is needed when it comes back empty.
+    if len(search_key_lower) >= 3:
+        _ensure_scooter_index_coverage(conn)
+        digests = list({
+            encryption_manager.blind_index(search_key_lower[i:i + 3])
+            for i in range(len(search_key_lower) - 2)
+        })
+        placeholders = ', '.join('?' for _ in digests)
+        candidate_ids = [row['scooter_id'] for row in conn.execute(
+            f"SELECT scooter_id FROM scooter_search_index WHERE token_hmac IN ({placeholders}) "
+            "GROUP BY scooter_id HAVING COUNT(DISTINCT token_hmac) = ?",
+            digests + [len(digests)]
+        )]
+        return [
+            row for row in _fetch_decrypted_by_ids('scooters', candidate_ids)
+            if any(search_key_lower in str(row.get(field, '')).lower()
+                   for field in searchable_fields)
+        ]
+
+    cached_text = _search_text_cache['scooters']
+    if cached_text is not None:
+        matched_ids = [row_id for row_id, text in cached_text.items() if search_key_lower in text]
+        return _fetch_decrypted_by_ids('scooters', matched_ids)
+
+    # Stream the scan instead of fetchall(); see search_travellers.
+    cursor = conn.execute("SELECT * FROM scooters")
+    cursor.arraysize = 128
+
+    results = []
+    search_text = {}
+
+    for row in cursor:
         try:
-            decrypted_row = {key: (encryption_manager.decrypt(value) if isinstance(value, bytes) else value) for key, value in dict(row).items()}
+            decrypted_row = _decrypt_result_row(row)
         except Exception:
             continue
 
-        match = False
-        for field in searchable_fields:
-            if field in decrypted_row and search_key_lower in str(decrypted_row[field]).lower():
-                match = True
-                break
+        # The joined-and-lowered cache text doubles as the match target, so
+        # each field is lowered and scanned once instead of once per check.
+        text = "\n".join(
+            str(decrypted_row.get(field, '')) for field in searchable_fields
+        ).lower()
+        search_text[decrypted_row['id']] = text
 
-        if match:
+        if search_key_lower in text:
             results.append(decrypted_row)
 
+    _search_text_cache['scooters'] = search_text
     return results
 
 
 # ---  Services ---
 
+# Field -> (validator, error message), in canonical field order. Drives both
+# the full-record check on insert and the present-fields-only check on update.
+_TRAVELLER_VALIDATORS = {
+    'first_name': (validation.is_valid_first_name, "Invalid First Name. Only letters, 2-30 characters."),
+    'last_name': (validation.is_valid_last_name, "Invalid Last Name. Only letters, 2-30 characters."),
+    'birthday': (validation.is_valid_iso_date, "Invalid Birthday. Format must be YYYY-MM-DD and not in the future."),
+    'gender': (validation.is_valid_gender, "Invalid Gender. Must be 'male' or 'female'."),
+    'street_name': (validation.is_valid_street_name, "Invalid Street Name. Letters and spaces, 2-50 characters."),
+    'house_number': (validation.is_valid_house_number, "Invalid House Number. 1-6 digits."),
+    'zip_code': (validation.is_valid_zip_code, "Invalid Zip Code format. DDDDXX (e.g., 1234AB)."),
+    'city': (lambda city: city in config.PREDEFINED_CITY_SET,
+             f"Invalid City. Must be one of: {', '.join(config.PREDEFINED_CITIES)}"),
+    'email': (validation.is_valid_email, "Invalid Email Address format."),
+    'mobile_phone': (validation.is_valid_phone_digits, "Invalid Mobile Phone. 8 digits required."),
+    'driving_license_number': (validation.is_valid_driving_license, "Invalid Driving License Number. XXDDDDDDD or XDDDDDDDD."),
+}
+
+def _traveller_validation_error(data: dict, partial: bool = False) -> str | None:
+    """Returns the error message for the first invalid traveller field, or None.
+    With partial=True (updates) only the fields present in data are checked;
+    otherwise every field is required."""
+    for field, (validator, message) in _TRAVELLER_VALIDATORS.items():
+        if partial and field not in data:
+            continue
+        if not validator(data.get(field, '')):
+            return message
+    return None
+
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
-def add_new_traveller(current_user: models.User, first_name, last_name, birthday, 
-                   gender, street_name, house_number, zip_code, city, email, 
+def add_new_traveller(current_user: models.User, first_name, last_name, birthday,
+                   gender, street_name, house_number, zip_code, city, email,
                    mobile_phone, driving_license_number):
     """Adds a new traveller to the database after validation and encryption."""
-    # Validate all fields
-    if not validation.is_valid_first_name(first_name):
-        print("Invalid First Name. Only letters, 2-30 characters.")
-        return False
-    if not validation.is_valid_last_name(last_name):
-        print("Invalid Last Name. Only letters, 2-30 characters.")
-        return False
-    if not validation.is_valid_iso_date(birthday):
-        print("Invalid Birthday. Format must be YYYY-MM-DD and not in the future.")
-        return False
-    if not validation.is_valid_gender(gender):
-        print("Invalid Gender. Must be 'male' or 'female'.")
-        return False
-    if not validation.is_valid_street_name(street_name):
-        print("Invalid Street Name. Letters and spaces, 2-50 characters.")
-        return False
-    if not validation.is_valid_house_number(house_number):
-        print("Invalid House Number. 1-6 digits.")
-        return False
-    if not validation.is_valid_zip_code(zip_code):
-        print("Invalid Zip Code format. DDDDXX (e.g., 1234AB).")
-        return False
-    if city not in config.PREDEFINED_CITIES:
-        print(f"Invalid City. Must be one of: {', '.join(config.PREDEFINED_CITIES)}")
-        return False
-    if not validation.is_valid_email(email):
-        print("Invalid Email Address format.")
-        return False
-    if not validation.is_valid_phone_digits(mobile_phone):
-        print("Invalid Mobile Phone. 8 digits required.")
-        return False
-    if not validation.is_valid_driving_license(driving_license_number):
-        print("Invalid Driving License Number. XXDDDDDDD or XDDDDDDDD.")
+    # 1. Validate all fields, in _TRAVELLER_FIELDS order.
+    field_values = [first_name, last_name, birthday, gender, street_name,
+                    house_number, zip_code, city, email, mobile_phone,
+                    driving_license_number]
+    error = _traveller_validation_error(dict(zip(_TRAVELLER_FIELDS, field_values)))
+    if error:
+        print(error)
         return False
 
     try:
-        conn = database.get_db_connection()
-        cursor = conn.cursor()
-        
-        # 2. Encrypt all PII fields
-        encrypted_data = {
-            "first_name": encryption_manager.encrypt(first_name),
-            "last_name": encryption_manager.encrypt(last_name),
-            "birthday": encryption_manager.encrypt(birthday),
-            "gender": encryption_manager.encrypt(gender),
-            "street_name": encryption_manager.encrypt(street_name),
-            "house_number": encryption_manager.encrypt(house_number),
-            "zip_code": encryption_manager.encrypt(zip_code),
-            "city": encryption_manager.encrypt(city),
-            "email": encryption_manager.encrypt(email),
-            "mobile_phone": encryption_manager.encrypt(mobile_phone),
-            "driving_license_number": encryption_manager.encrypt(driving_license_number)
-        }
-        
+        # 2. Encrypt all PII fields in one batch. The insert statement lists
+        # its columns in the same order, so the ciphertexts go straight into
+        # the parameter tuple without an intermediate dict to build and
+        # re-index.
+        encrypted_values = encryption_manager.encrypt_many(
+            [value if isinstance(value, str) else str(value) for value in field_values]
+        )
+
         # 3. Insert into DB using parameterized query
-        cursor.execute("""
-            INSERT INTO travellers (first_name, last_name, birthday, gender, street_name, house_number, zip_code, city, email, mobile_phone, driving_license_number, registration_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            encrypted_data['first_name'], encrypted_data['last_name'], encrypted_data['birthday'],
-            encrypted_data['gender'], encrypted_data['street_name'], encrypted_data['house_number'],
-            encrypted_data['zip_code'], encrypted_data['city'], encrypted_data['email'],
-            encrypted_data['mobile_phone'], encrypted_data['driving_license_number'],
-            datetime.now().strftime("%Y-%m-%d")
-        ))
-        conn.commit()
-        
+        conn = database.get_db_connection()
+        registration_date = _today_iso()
+        with conn:
+            cursor = conn.execute(_SQL_INSERT_TRAVELLER + " RETURNING id", (
+                *encrypted_values,
+                registration_date,
+                encryption_manager.blind_index(email),
+                encryption_manager.blind_index(mobile_phone),
+                encryption_manager.blind_index(driving_license_number),
+                encryption_manager.blind_index(zip_code),
+                encryption_manager.blind_index(str(house_number))
+            ))
+            new_id = cursor.fetchone()['id']
+            _index_traveller_tokens(conn, new_id, [first_name, last_name, email,
+                                                  mobile_phone, driving_license_number])
+
+        # RETURNING gives us the new id without a second statement, so the
+        # search cache can be extended in place instead of thrown away.
+        cached_text = _search_text_cache['travellers']
+        if cached_text is not None:
+            cached_text[new_id] = "\n".join(
+                str(value) for value in
+                [new_id] + field_values + [registration_date]
+            ).lower()
+
         # 4. Log the action
         secure_logger.log(current_user.username, "Added new traveller", f"Traveller email: {email}")
         print("Traveller added successfully.")
@@ -647,96 +899,370 @@ def add_new_traveller(current_user: models.User, first_name, last_name, birthday
     except Exception as e:
         print(f"An error occurred while adding traveller: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
+
+_TRAVELLER_FIELDS = ('first_name', 'last_name', 'birthday', 'gender', 'street_name',
+                     'house_number', 'zip_code', 'city', 'email', 'mobile_phone',
+                     'driving_license_number')
+
+# Canonical partial-update statement, same COALESCE scheme as
+# _SQL_UPDATE_USER_NAMES: one stable SQL text for every field combination.
+_TRAVELLER_UPDATE_COLUMNS = _TRAVELLER_FIELDS + tuple(_TRAVELLER_BLIND_FIELDS.values())
+_SQL_UPDATE_TRAVELLER = (
+    "UPDATE travellers SET "
+    + ", ".join(f"{column} = COALESCE(?, {column})" for column in _TRAVELLER_UPDATE_COLUMNS)
+    + " WHERE id = ?"
+)
+
+# Fields whose exact values and trigrams are tokenized into
+# traveller_search_index so partial searches can resolve via the index.
+_TRAVELLER_TOKEN_FIELDS = ('first_name', 'last_name', 'email', 'mobile_phone',
+                           'driving_license_number')
+
+_SQL_INSERT_SEARCH_TOKEN = (
+    "INSERT INTO traveller_search_index (traveller_id, token_hmac) VALUES (?, ?)"
+)
+
+def _search_tokens(values) -> set[bytes]:
+    """HMAC digests of each value and of every trigram within it."""
+    blind_index = encryption_manager.blind_index
+    tokens = set()
+    for value in values:
+        value = str(value)
+        if not value:
+            continue
+        tokens.add(blind_index(value))
+        for i in range(len(value) - 2):
+            tokens.add(blind_index(value[i:i + 3]))
+    return tokens
+
+def _index_traveller_tokens(conn, traveller_id: int, values):
+    """Stores the search tokens for one traveller (caller owns the transaction)."""
+    conn.executemany(
+        _SQL_INSERT_SEARCH_TOKEN,
+        [(traveller_id, token) for token in _search_tokens(values)]
+    )
+
+def _reindex_traveller(conn, traveller_id: int, values):
+    """Replaces a traveller's search tokens after an update."""
+    conn.execute("DELETE FROM traveller_search_index WHERE traveller_id = ?", (traveller_id,))
+    _index_traveller_tokens(conn, traveller_id, values)
+
+# Databases created before the token index existed have unindexed rows; they
+# are backfilled once per session before the index is trusted for a search.
+_traveller_index_checked = False
+
+def _ensure_traveller_index_coverage(conn):
+    global _traveller_index_checked
+    if _traveller_index_checked:
+        return
+    cursor = conn.execute(
+        "SELECT * FROM travellers WHERE id NOT IN (SELECT traveller_id FROM traveller_search_index)"
+    )
+    unindexed = cursor.fetchall()
+    if unindexed:
+        with conn:
+            for row in unindexed:
+                values = [encryption_manager.decrypt(row[field]) for field in _TRAVELLER_TOKEN_FIELDS]
+                _index_traveller_tokens(conn, row['id'], values)
+    _traveller_index_checked = True
+
+# Scooter counterpart of the traveller token index: trigram HMAC tokens of
+# the three searchable fields, kept in scooter_search_index.
+_SCOOTER_TOKEN_FIELDS = ('serial_number', 'brand', 'model')
+
+_SQL_INSERT_SCOOTER_TOKEN = (
+    "INSERT INTO scooter_search_index (scooter_id, token_hmac) VALUES (?, ?)"
+)
+
+def _index_scooter_tokens(conn, scooter_id: int, values):
+    """Stores the search tokens for one scooter (caller owns the transaction)."""
+    conn.executemany(
+        _SQL_INSERT_SCOOTER_TOKEN,
+        [(scooter_id, token) for token in _search_tokens(values)]
+    )
+
+def _reindex_scooter(conn, scooter_id: int, values):
+    """Replaces a scooter's search tokens after an update."""
+    conn.execute("DELETE FROM scooter_search_index WHERE scooter_id = ?", (scooter_id,))
+    _index_scooter_tokens(conn, scooter_id, values)
+
+_scooter_index_checked = False
+
+def _ensure_scooter_index_coverage(conn):
+    global _scooter_index_checked
+    if _scooter_index_checked:
+        return
+    unindexed = conn.execute(
+        "SELECT * FROM scooters WHERE id NOT IN (SELECT scooter_id FROM scooter_search_index)"
+    ).fetchall()
+    if unindexed:
+        with conn:
+            for row in unindexed:
+                values = [encryption_manager.decrypt(row[field]) for field in _SCOOTER_TOKEN_FIELDS]
+                _index_scooter_tokens(conn, row['id'], values)
+    _scooter_index_checked = True
+
+@requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
+def add_new_travellers_bulk(current_user: models.User, travellers: list[dict]):
+    """
+    Adds many travellers in a single transaction.
+    Inserting rows one call at a time pays one commit (and fsync) per row;
+    this validates and encrypts all rows up front, then inserts them all
+    inside one transaction. Rejects the whole batch if any row is
+    invalid, so a partial import never reaches the database.
+    """
+    if not travellers:
+        print("No travellers to add.")
+        return False
+
+    encrypted_rows = []
+    registration_date = _today_iso()
+    for index, data in enumerate(travellers):
+        values = [data.get(field, '') for field in _TRAVELLER_FIELDS]
+        error = _traveller_validation_error(data)
+        if error:
+            print(f"Row {index + 1}: {error}")
+            return False
+        encrypted_rows.append(
+            tuple(encryption_manager.encrypt_many([value if isinstance(value, str) else str(value) for value in values]))
+            + (registration_date,
+               encryption_manager.blind_index(str(data.get('email', ''))),
+               encryption_manager.blind_index(str(data.get('mobile_phone', ''))),
+               encryption_manager.blind_index(str(data.get('driving_license_number', ''))),
+               encryption_manager.blind_index(str(data.get('zip_code', ''))),
+               encryption_manager.blind_index(str(data.get('house_number', ''))))
+        )
+
+    try:
+        conn = database.get_db_connection()
+        with conn:
+            # Row-at-a-time RETURNING instead of executemany: the search-token
+            # index needs each new id. Still one transaction, one fsync.
+            for data, row in zip(travellers, encrypted_rows):
+                cursor = conn.execute(_SQL_INSERT_TRAVELLER + " RETURNING id", row)
+                new_id = cursor.fetchone()['id']
+                _index_traveller_tokens(
+                    conn, new_id, [data.get(field, '') for field in _TRAVELLER_TOKEN_FIELDS]
+                )
+        _invalidate_search_cache('travellers')
+        secure_logger.log(current_user.username, "Added travellers in bulk", f"Count: {len(encrypted_rows)}")
+        print(f"{len(encrypted_rows)} travellers added successfully.")
+        return True
+    except Exception as e:
+        print(f"An error occurred while adding travellers: {e}")
+        return False
+
+_SCOOTER_FIELDS = ('serial_number', 'brand', 'model', 'top_speed', 'battery_capacity',
+                   'state_of_charge', 'target_range_soc_min', 'target_range_soc_max',
+                   'location_lat', 'location_lon', 'out_of_service_status', 'mileage',
+                   'last_maintenance_date')
+
+# Canonical partial-update statement; see _SQL_UPDATE_TRAVELLER.
+_SCOOTER_UPDATE_COLUMNS = _SCOOTER_FIELDS + tuple(_SCOOTER_BLIND_FIELDS.values())
+_SQL_UPDATE_SCOOTER = (
+    "UPDATE scooters SET "
+    + ", ".join(f"{column} = COALESCE(?, {column})" for column in _SCOOTER_UPDATE_COLUMNS)
+    + " WHERE id = ?"
+)
+
+@requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
+def add_new_scooters_bulk(current_user: models.User, scooters: list[dict]):
+    """
+    Adds many scooters in a single transaction.
+    Same pattern as add_new_travellers_bulk: validate and encrypt every
+    row first, then one executemany under one commit.
+    """
+    if not scooters:
+        print("No scooters to add.")
+        return False
+
+    encrypted_rows = []
+    in_service_date = datetime.now().isoformat(sep=" ", timespec="seconds")
+    for index, data in enumerate(scooters):
+        error = _scooter_validation_error(
+            data.get('serial_number', ''), data.get('location_lat', ''),
+            data.get('location_lon', ''), data.get('last_maintenance_date', '')
+        )
+        if error:
+            print(f"Row {index + 1}: {error}")
+            return False
+        encrypted = tuple(
+            encryption_manager.encrypt_many([str(data.get(field, '')) for field in _SCOOTER_FIELDS])
+        )
+        encrypted_rows.append(
+            encrypted[:3] + (in_service_date,) + encrypted[3:]
+            + (encryption_manager.blind_index(str(data.get('serial_number', ''))),
+               encryption_manager.blind_index(str(data.get('brand', ''))),
+               encryption_manager.blind_index(str(data.get('model', ''))))
+        )
+
+    try:
+        conn = database.get_db_connection()
+        with conn:
+            # Row-at-a-time RETURNING instead of executemany: the search-token
+            # index needs each new id. Still one transaction, one fsync.
+            for data, encrypted_row in zip(scooters, encrypted_rows):
+                cursor = conn.execute(_SQL_INSERT_SCOOTER + " RETURNING id", encrypted_row)
+                new_id = cursor.fetchone()['id']
+                _index_scooter_tokens(
+                    conn, new_id, [data.get(field, '') for field in _SCOOTER_TOKEN_FIELDS]
+                )
+        _invalidate_search_cache('scooters')
+        secure_logger.log(current_user.username, "Added scooters in bulk", f"Count: {len(encrypted_rows)}")
+        print(f"{len(encrypted_rows)} scooters added successfully.")
+        return True
+    except sqlite3.IntegrityError:
+        print("Error: A scooter in the batch has a serial number that already exists.")
+        return False
+    except Exception as e:
+        print(f"An error occurred while adding scooters: {e}")
+        return False
 
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
-def search_travellers(current_user: models.User, search_key: str):
+def search_travellers(current_user: models.User, search_key: str, fields: list[str] | None = None):
     """
     Searches for travellers by a partial key.
-    NOTE: This is computationally expensive as it decrypts all records in memory.
+    Exact email/phone/licence keys resolve through the blind-index columns
+    without decrypting; only partial keys fall back to the full scan.
+    fields optionally narrows the search to the named traveller fields
+    (e.g. ['email']): only those blind indexes are probed and only those
+    fields are compared, so a caller that knows what it is looking for
+    never pays for matches elsewhere in the record.
     """
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM travellers")
-    all_travellers = cursor.fetchall()
-    conn.close()
 
-    results = []
+    if fields is None:
+        bi_columns = ('email_bi', 'phone_bi', 'license_bi')
+        verify_fields = _TRAVELLER_TOKEN_FIELDS
+    else:
+        bi_columns = tuple(_TRAVELLER_BLIND_FIELDS[field] for field in fields
+                           if field in _TRAVELLER_BLIND_FIELDS)
+        verify_fields = tuple(field for field in fields if field in _TRAVELLER_TOKEN_FIELDS)
+
+    if bi_columns:
+        digest = encryption_manager.blind_index(search_key)
+        exact_matches = conn.execute(
+            "SELECT * FROM travellers WHERE " + " OR ".join(f"{column} = ?" for column in bi_columns),
+            (digest,) * len(bi_columns)
+        ).fetchall()
+        if exact_matches:
+            return [_decrypt_result_row(row) for row in exact_matches]
+
     search_key_lower = search_key.lower()
 
-    for row in all_travellers:
-        decrypted_row = {key: encryption_manager.decrypt(value) if isinstance(value, bytes) else value for key, value in dict(row).items()}
-        
-        match = False
-        for value in decrypted_row.values():
-            if search_key_lower in str(value).lower():
-                match = True
-                break
-        
+    # Partial keys of three or more characters resolve via the trigram token
+    # index: candidates must contain every trigram of the key, then a
+    # substring check on the decrypted candidates removes false positives.
+    if len(search_key_lower) >= 3 and verify_fields:
+        _ensure_traveller_index_coverage(conn)
+        digests = list({
+            encryption_manager.blind_index(search_key_lower[i:i + 3])
+            for i in range(len(search_key_lower) - 2)
+        })
+        placeholders = ', '.join('?' for _ in digests)
+        candidate_ids = [row['traveller_id'] for row in conn.execute(
+            f"SELECT traveller_id FROM traveller_search_index WHERE token_hmac IN ({placeholders}) "
+            "GROUP BY traveller_id HAVING COUNT(DISTINCT token_hmac) = ?",
+            digests + [len(digests)]
+        )]
+        results = [
+            row for row in _fetch_decrypted_by_ids('travellers', candidate_ids)
+            if any(search_key_lower in str(row.get(field, '')).lower()
+                   for field in verify_fields)
+        ]
+        if results:
+            return results
+        # Fall through: the key may match a field that is not tokenized
+        # (city, street, dates), which only the full scan can find.
+
+    cached_text = _search_text_cache['travellers']
+    if cached_text is not None:
+        matched_ids = [row_id for row_id, text in cached_text.items() if search_key_lower in text]
+        rows = _fetch_decrypted_by_ids('travellers', matched_ids)
+        if fields is None:
+            return rows
+        # The cache text spans the whole record, so re-check the narrowed fields.
+        return [row for row in rows
+                if any(search_key_lower in str(row.get(field, '')).lower() for field in fields)]
+
+    # Stream the scan instead of fetchall(): rows are decrypted and tested one
+    # at a time, so peak memory stays at one row of ciphertext rather than the
+    # whole table. arraysize batches the underlying C-level fetches.
+    cursor = conn.execute("SELECT * FROM travellers")
+    cursor.arraysize = 128
+
+    results = []
+    search_text = {}
+
+    for row in cursor:
+        decrypted_row = _decrypt_result_row(row)
+
+        # The joined-and-lowered cache text doubles as the match target for
+        # whole-record searches; narrowed searches still check their fields.
+        text = "\n".join(str(value) for value in decrypted_row.values()).lower()
+        search_text[decrypted_row['id']] = text
+
+        if fields is None:
+            match = search_key_lower in text
+        else:
+            match = any(search_key_lower in str(decrypted_row.get(field, '')).lower()
+                        for field in fields)
+
         if match:
             results.append(decrypted_row)
-            
+
+    _search_text_cache['travellers'] = search_text
     return results
 
+@requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
+def search_travellers_by_address(current_user: models.User, zip_code: str, house_number: str):
+    """
+    Finds travellers living at an exact zip code + house number through the
+    composite blind index, without decrypting any non-matching rows.
+    """
+    conn = database.get_db_connection()
+    cursor = conn.execute(
+        "SELECT * FROM travellers WHERE zip_bi = ? AND house_bi = ?",
+        (encryption_manager.blind_index(zip_code), encryption_manager.blind_index(str(house_number)))
+    )
+    return [_decrypt_result_row(row) for row in cursor.fetchall()]
+
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
 def update_traveller(current_user: models.User, traveller_id: int, new_data: dict):
     """Updates an existing traveller's information."""
-    if 'first_name' in new_data and not validation.is_valid_first_name(new_data['first_name']):
-        print("Invalid First Name. Only letters, 2-30 characters.")
-        return False
-    if 'last_name' in new_data and not validation.is_valid_last_name(new_data['last_name']):
-        print("Invalid Last Name. Only letters, 2-30 characters.")
-        return False
-    if 'birthday' in new_data and not validation.is_valid_iso_date(new_data['birthday']):
-        print("Invalid Birthday. Format must be YYYY-MM-DD and not in the future.")
-        return False
-    if 'gender' in new_data and not validation.is_valid_gender(new_data['gender']):
-        print("Invalid Gender. Must be 'male' or 'female'.")
-        return False
-    if 'street_name' in new_data and not validation.is_valid_street_name(new_data['street_name']):
-        print("Invalid Street Name. Letters and spaces, 2-50 characters.")
-        return False
-    if 'house_number' in new_data and not validation.is_valid_house_number(new_data['house_number']):
-        print("Invalid House Number. 1-6 digits.")
-        return False
-    if 'zip_code' in new_data and not validation.is_valid_zip_code(new_data['zip_code']):
-        print("Invalid Zip Code format. DDDDXX (e.g., 1234AB).")
-        return False
-    if 'city' in new_data and new_data['city'] not in config.PREDEFINED_CITIES:
-        print(f"Invalid City. Must be one of: {', '.join(config.PREDEFINED_CITIES)}")
-        return False
-    if 'email' in new_data and not validation.is_valid_email(new_data['email']):
-        print("Invalid Email Address format.")
-        return False
-    if 'mobile_phone' in new_data and not validation.is_valid_phone_digits(new_data['mobile_phone']):
-        print("Invalid Mobile Phone. 8 digits required.")
-        return False
-    if 'driving_license_number' in new_data and not validation.is_valid_driving_license(new_data['driving_license_number']):
-        print("Invalid Driving License Number. XXDDDDDDD or XDDDDDDDD.")
+    error = _traveller_validation_error(new_data, partial=True)
+    if error:
+        print(error)
         return False
 
-    encrypted_data = {key: encryption_manager.encrypt(str(value)) for key, value in new_data.items()}
-    
+    encrypted_data = {key: encryption_manager.encrypt(value if isinstance(value, str) else str(value)) for key, value in new_data.items()}
+    for field, bi_column in _TRAVELLER_BLIND_FIELDS.items():
+        if field in new_data:
+            encrypted_data[bi_column] = encryption_manager.blind_index(str(new_data[field]))
+
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    
-    set_clause = ", ".join([f"{key} = ?" for key in encrypted_data.keys()])
-    params = list(encrypted_data.values())
+
+    # Absent columns pass NULL into the canonical COALESCE statement and
+    # keep their stored value.
+    params = [encrypted_data.get(column) for column in _TRAVELLER_UPDATE_COLUMNS]
     params.append(traveller_id)
-    
-    query = f"UPDATE travellers SET {set_clause} WHERE id = ?"
-    
-    cursor.execute(query, tuple(params))
-    
-    if cursor.rowcount == 0:
-        print(f"Error: Traveller with ID {traveller_id} not found.")
-        conn.close()
-        return False
-        
-    conn.commit()
-    conn.close()
+
+    with conn:
+        cursor = conn.execute(_SQL_UPDATE_TRAVELLER, params)
+        if cursor.rowcount == 0:
+            print(f"Error: Traveller with ID {traveller_id} not found.")
+            return False
+        if any(field in new_data for field in _TRAVELLER_TOKEN_FIELDS):
+            row = conn.execute(
+                "SELECT first_name, last_name, email, mobile_phone, driving_license_number "
+                "FROM travellers WHERE id = ?", (traveller_id,)
+            ).fetchone()
+            _reindex_traveller(
+                conn, traveller_id,
+                [encryption_manager.decrypt(row[field]) for field in _TRAVELLER_TOKEN_FIELDS]
+            )
+
+    _invalidate_search_cache('travellers')
     secure_logger.log(current_user.username, "Updated traveller info", f"Traveller ID: {traveller_id}")
     print("Traveller information updated successfully.")
     return True
@@ -745,16 +1271,14 @@ def update_traveller(current_user: models.User, traveller_id: int, new_data: dic
 def delete_traveller(current_user: models.User, traveller_id: int):
     """Deletes a traveller from the system."""
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM travellers WHERE id = ?", (traveller_id,))
-    
-    if cursor.rowcount == 0:
-        print(f"Error: Traveller with ID {traveller_id} not found.")
-        conn.close()
-        return False
+    with conn:
+        cursor = conn.execute("DELETE FROM travellers WHERE id = ?", (traveller_id,))
+        if cursor.rowcount == 0:
+            print(f"Error: Traveller with ID {traveller_id} not found.")
+            return False
+        conn.execute("DELETE FROM traveller_search_index WHERE traveller_id = ?", (traveller_id,))
 
-    conn.commit()
-    conn.close()
+    _invalidate_search_cache('travellers')
     secure_logger.log(current_user.username, "Deleted traveller", f"Traveller ID: {traveller_id}", is_suspicious=True)
     print(f"Traveller with ID {traveller_id} deleted successfully.")
     return True
@@ -766,21 +1290,37 @@ def create_backup(current_user: models.User):
     """Creates a timestamped zip archive of the database."""
     backup_dir = os.path.join("src", "backups")
     os.makedirs(backup_dir, exist_ok=True)
-    
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     backup_filename = f"backup_{timestamp}.zip"
     backup_filepath = os.path.join(backup_dir, backup_filename)
-    
+
+    snapshot_path = backup_filepath + ".db"
     try:
-        with zipfile.ZipFile(backup_filepath, 'w') as zf:
-            zf.write(config.DATABASE_FILE)
-        
+        # Flush pending log entries so they are part of the backup, then
+        # snapshot through the online backup API: it copies a consistent
+        # image of the live database without locking it for the duration.
+        secure_logger.flush()
+        conn = database.get_db_connection()
+        snapshot = sqlite3.connect(snapshot_path)
+        try:
+            with snapshot:
+                conn.backup(snapshot)
+        finally:
+            snapshot.close()
+
+        with zipfile.ZipFile(backup_filepath, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.write(snapshot_path, arcname=config.DATABASE_FILE)
+
         secure_logger.log(current_user.username, "Created backup", f"File: {backup_filename}")
         print(f"Successfully created backup: {backup_filepath}")
         return True
     except Exception as e:
         print(f"Error creating backup: {e}")
         return False
+    finally:
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
 
 @requires_role([config.ROLE_SUPER_ADMIN])
 def generate_restore_code(current_user: models.User, target_system_admin_username: str, backup_filename: str):
@@ -790,14 +1330,13 @@ def generate_restore_code(current_user: models.User, target_system_admin_usernam
     code = secrets.token_hex(16)
     encrypted_code = encryption_manager.encrypt(code)
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO restore_codes (code, backup_filename, system_admin_username, generated_at) VALUES (?, ?, ?, ?)",
-        (encrypted_code, backup_filename, target_system_admin_username, datetime.now().isoformat())
-    )
-    conn.commit()
-    conn.close()
-    
+    with conn:
+        conn.execute(
+            "INSERT INTO restore_codes (code, backup_filename, system_admin_username, generated_at, code_hmac) VALUES (?, ?, ?, ?, ?)",
+            (encrypted_code, backup_filename, target_system_admin_username,
+             datetime.now().isoformat(), encryption_manager.blind_index(code))
+        )
+
     secure_logger.log(current_user.username, "Generated restore code", f"For user {target_system_admin_username}, file {backup_filename}")
     print("\n--- Restore Code Generated ---")
     print(f"Code: {code}")
@@ -815,41 +1354,26 @@ def revoke_restore_code(current_user: models.User, code_to_revoke: str):
     """
     try:
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id, code FROM restore_codes WHERE is_used = 0")
-        all_active_codes = cursor.fetchall()
-
-        code_id_to_revoke = None
-        for row in all_active_codes:
-            try:
-                decrypted_code = encryption_manager.decrypt(row['code'])
-                if decrypted_code == code_to_revoke:
-                    code_id_to_revoke = row['id']
-                    break
-            except Exception:
-                continue
-
-        if code_id_to_revoke is None:
+        # One indexed UPDATE via the HMAC digest both locates and revokes the
+        # code; RETURNING supplies the id for the audit log, and no row back
+        # means the code was unknown or already spent.
+        with conn:
+            row = conn.execute(
+                "UPDATE restore_codes SET is_used = 1 "
+                "WHERE code_hmac = ? AND is_used = 0 RETURNING id",
+                (encryption_manager.blind_index(code_to_revoke),)
+            ).fetchone()
+
+        if row is None:
             print("Error: Active restore code not found or it has already been used/revoked.")
             return False
 
-        cursor.execute("UPDATE restore_codes SET is_used = 1 WHERE id = ?", (code_id_to_revoke,))
-        conn.commit()
-
-        if cursor.rowcount > 0:
-            secure_logger.log(current_user.username, "Revoked restore code", f"Code ID: {code_id_to_revoke}", is_suspicious=True)
-            print("Restore code has been successfully revoked.")
-            return True
-        else:
-            print("Error: Failed to revoke the code in the database.")
-            return False
+        secure_logger.log(current_user.username, "Revoked restore code", f"Code ID: {row['id']}", is_suspicious=True)
+        print("Restore code has been successfully revoked.")
+        return True
     except Exception as e:
         print(f"An error occurred while revoking the code: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
 
 @requires_role([config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN])
 def restore_from_backup(current_user: models.User, backup_filename: str, restore_code: str = None):
@@ -864,31 +1388,54 @@ def restore_from_backup(current_user: models.User, backup_filename: str, restore
         if not restore_code:
             print("Error: A restore code is required for System Administrators.")
             return False
-            
+
         conn = database.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM restore_codes WHERE system_admin_username = ? AND backup_filename = ? AND is_used = 0",
-            (current_user.username, backup_filename)
-        )
-        code_data = cursor.fetchone()
-        
-        if not code_data or encryption_manager.decrypt(code_data['code']) != restore_code:
+        # One UPDATE both validates and consumes the code: the digest joins
+        # the WHERE clause, so a wrong code matches no row, and a matching
+        # code is atomically marked used with no gap between check and claim.
+        with conn:
+            claimed = conn.execute(
+                "UPDATE restore_codes SET is_used = 1 "
+                "WHERE system_admin_username = ? AND backup_filename = ? "
+                "AND is_used = 0 AND code_hmac = ?",
+                (current_user.username, backup_filename, encryption_manager.blind_index(restore_code))
+            ).rowcount
+
+        if not claimed:
             print("Error: Invalid, expired, or incorrect restore code for this backup/user.")
             secure_logger.log(current_user.username, "Failed backup restore", f"Invalid code used for {backup_filename}", is_suspicious=True)
-            conn.close()
             return False
-            
-        cursor.execute("UPDATE restore_codes SET is_used = 1 WHERE id = ?", (code_data['id'],))
-        conn.commit()
-        conn.close()
 
     # Super Admin or validated System Admin can proceed
     try:
+        # The database file is about to be replaced on disk, so drop the
+        # shared connection and any cached lookups; the connection reopens
+        # lazily against the restored file.
+        database.close_db_connection()
+        _invalidate_user_cache()
+        _invalidate_search_cache('travellers')
+        _invalidate_search_cache('scooters')
+        global _traveller_index_checked, _scooter_index_checked, _suspicious_alert_cache
+        _traveller_index_checked = False
+        _scooter_index_checked = False
+        _suspicious_alert_cache = None
+        # Stream the member out with a 2 MiB buffer instead of extract()'s
+        # small default copy chunks: far fewer read/write syscalls on what is
+        # a pure I/O-bound copy.
         with zipfile.ZipFile(backup_filepath, 'r') as zf:
-            zf.extract(config.DATABASE_FILE, path=".")
-        
+            with zf.open(config.DATABASE_FILE) as src, open(config.DATABASE_FILE, 'wb') as dst:
+                shutil.copyfileobj(src, dst, length=2 * 1024 * 1024)
+
+        # The backup may predate schema migrations (blind-index columns,
+        # token tables, code_hmac); re-running initialization brings the
+        # restored file up to the current schema before anything queries it.
+        database.initialize_database()
+
+        # Logged only after the swap: a suspicious entry flushes immediately,
+        # and writing it before the copy would put it in the file that is
+        # about to be overwritten, losing the audit record of the restore.
         secure_logger.log(current_user.username, "Restored from backup", f"File: {backup_filename}", is_suspicious=True)
+
         print("\n!!! --- System Restored --- !!!")
         print("Database has been restored from backup.")
         print("It is recommended to restart the application.")
@@ -899,28 +1446,49 @@ def restore_from_backup(current_user: models.User, backup_filename: str, restore
         return False
 
 # --- Log Services ---
+
+# (generation, count) memo for the unread-suspicious COUNT. The generation is
+# the logger's suspicious_seq, so the query only reruns after a new suspicious
+# entry was logged; marking logs as read or restoring a backup drops the memo.
+_suspicious_alert_cache: tuple[int, int] | None = None
+
 def check_for_unread_suspicious_logs():
     """Checks for and alerts about unread suspicious logs."""
-    conn = database.get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM logs WHERE suspicious = 1 AND is_read = 0")
-    count = cursor.fetchone()[0]
-    conn.close()
-    
+    global _suspicious_alert_cache
+    seq = secure_logger.suspicious_seq
+    if _suspicious_alert_cache is not None and _suspicious_alert_cache[0] == seq:
+        count = _suspicious_alert_cache[1]
+    else:
+        conn = database.get_db_connection()
+        count = conn.execute(
+            "SELECT COUNT(*) FROM logs WHERE suspicious = 1 AND is_read = 0"
+        ).fetchone()[0]
+        _suspicious_alert_cache = (seq, count)
+
     if count > 0:
         print("\n--- !!! SECURITY ALERT !!! ---")
         print(f"There are {count} unread suspicious activity logs.")
         print("Please review the system logs immediately.")
         print("----------------------------\n")
 
-def mark_logs_as_read(log_ids: list[int]):
-    """Marks a list of log IDs as read."""
+def mark_logs_as_read(log_ids: list[int]) -> int:
+    """Marks a list of log IDs as read; returns how many rows were marked.
+
+    The single UPDATE both marks and counts, so callers need no follow-up
+    SELECT to learn whether anything was actually dismissed."""
     if not log_ids:
-        return
+        return 0
     conn = database.get_db_connection()
-    cursor = conn.cursor()
-    placeholders = ', '.join('?' for _ in log_ids)
-    query = f"UPDATE logs SET is_read = 1 WHERE id IN ({placeholders}) AND suspicious = 1"
-    cursor.execute(query, log_ids)
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    # json_each keeps the SQL text identical for any batch size, so the
+    # statement cache hits and the 999-parameter limit never applies.
+    with conn:
+        cursor = conn.execute(
+            "UPDATE logs SET is_read = 1 "
+            "WHERE suspicious = 1 AND is_read = 0 "
+            "AND id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(log_ids)),)
+        )
+    if cursor.rowcount:
+        global _suspicious_alert_cache
+        _suspicious_alert_cache = None
+    return cursor.rowcount
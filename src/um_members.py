@@ -1,9 +1,53 @@
 # src/um_members.py
 # to run, run in terminal: python src/um_members.py
 
-import getpass
+import functools
+import hmac
+import re
+import sys
 import database, auth, config, services, models, validation
-from datetime import datetime
+
+# Direct writer for short fixed messages on hot error paths; skips print()'s
+# per-call argument handling and second write for the line ending.
+_write = sys.stdout.write
+
+# The city list is fixed at runtime, so the numbered menu is rendered once at
+# import instead of being rebuilt for every traveller prompt.
+_CITY_MENU = "\n".join(f"{i}. {city}" for i, city in enumerate(config.PREDEFINED_CITIES, 1))
+
+# Accepted confirmations for destructive actions; membership test avoids a
+# lowercased copy of the input per check.
+_YES = frozenset({'yes', 'YES', 'Yes', 'y', 'Y'})
+
+# Roles allowed to edit admin-only scooter fields; hashed membership test
+# instead of building a list literal on every call.
+_ADMIN_ROLES = frozenset({config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN})
+
+# Keyword-to-role table for the new-user role prompt; first token lookup
+# instead of substring scans per retry.
+_ROLE_KEYWORDS = {
+    'system': config.ROLE_SYSTEM_ADMIN,
+    'sys': config.ROLE_SYSTEM_ADMIN,
+    'service': config.ROLE_SERVICE_ENGINEER,
+    'svc': config.ROLE_SERVICE_ENGINEER,
+    'engineer': config.ROLE_SERVICE_ENGINEER,
+}
+
+# Pre-bound restore call for Super Admins (no restore code needed), so the
+# menu loop does not rebuild the keyword arguments on every invocation.
+_restore_super = functools.partial(services.restore_from_backup, restore_code=None)
+
+# Columns whose content width is effectively constant (small ids, enumerated
+# values, fixed-length dates); skips the per-row width scan for them.
+_FIXED_WIDTHS = {
+    'id': 5,
+    'role': 20,
+    'registration_date': 19,
+    'date': 10,
+    'time': 8,
+    'is_suspicious': 13,
+    'is_read': 7,
+}
 
 # --- UI Helper Functions ---
 
@@ -19,52 +63,84 @@ def display_results(results: list[dict]):
         print("No results found.")
         return
     
-    headers = results[0].keys()
-    col_widths = {h: max(len(h), max((len(str(r.get(h, ''))) for r in results), default=0)) for h in headers}
-    for h in col_widths:
-        col_widths[h] = min(col_widths[h], 30)
-
-    header_line = " | ".join(h.ljust(col_widths[h]) for h in headers)
-    print("\n" + header_line)
-    print("-" * len(header_line))
-    
-    for row in results:
-        row_line = " | ".join(str(row.get(h, '')).ljust(col_widths[h]) for h in headers)
-        print(row_line)
-    print()
+    headers = list(results[0].keys())
+
+    # Column-major layout: stringify one column at a time so the width scan
+    # walks a single contiguous list per column, then transpose once with zip
+    # when emitting rows. Avoids building a row-major copy just to flip it.
+    columns = [[str(r.get(h, '')) for r in results] for h in headers]
+    col_widths = [
+        _FIXED_WIDTHS.get(h) or min(30, max(len(h), max(map(len, column), default=0)))
+        for h, column in zip(headers, columns)
+    ]
+
+    # One format template for the whole table: a single C-level str.format call
+    # per row instead of a ljust allocation per cell.
+    row_tmpl = " | ".join([f"{{:<{w}}}" for w in col_widths])
+
+    header_line = row_tmpl.format(*headers)
+    lines = ["", header_line, "-" * len(header_line)]
+    for row in zip(*columns):
+        lines.append(row_tmpl.format(*row))
+    lines.append("")
+    _write("\n".join(lines) + "\n")
 
 # --- Input Validation and Prompting ---
 
+# Bounded memo of validator outcomes; the validation.is_valid_* functions are
+# pure, so repeated (validator, input) pairs can skip the regex work entirely.
+_validation_cache = {}
+_VALIDATION_CACHE_MAX = 1024
+
 def prompt_with_validation(prompt_text: str, validation_func, error_message: str, optional: bool = False, transform_func=None):
     """Prompts user for input and validates it using the provided function. Loops until valid input is given."""
     while True:
         user_input = input(prompt_text)
         if optional and not user_input:
             return None
-        
-        if validation_func(user_input):
+
+        cache_key = (validation_func, user_input)
+        is_valid = _validation_cache.get(cache_key)
+        if is_valid is None:
+            is_valid = validation_func(user_input)
+            if len(_validation_cache) < _VALIDATION_CACHE_MAX:
+                _validation_cache[cache_key] = is_valid
+
+        if is_valid:
             return transform_func(user_input) if transform_func else user_input
         else:
             print(f"Invalid input: {error_message}")
 
+def _range_msg(min_val, max_val) -> str:
+    """Returns the range description for an out-of-range message without building intermediate lists."""
+    if min_val is not None and max_val is not None:
+        return f"at least {min_val} and at most {max_val}"
+    if min_val is not None:
+        return f"at least {min_val}"
+    if max_val is not None:
+        return f"at most {max_val}"
+    return ""
+
+# Fast-path shape check for numeric prompts; rejecting bad input here avoids
+# raising/unwinding a ValueError per invalid attempt.
+_FLOAT_RE = re.compile(r"^-?\d+(\.\d+)?$")
+
 def prompt_for_float(prompt_text: str, min_val=None, max_val=None, optional: bool = False):
     """Prompts user for a float and validates range. Loops until valid input is given."""
     while True:
         user_input = input(prompt_text)
         if optional and not user_input:
             return None
-        try:
-            value = float(user_input)
-            if (min_val is not None and value < min_val) or \
-               (max_val is not None and value > max_val):
-                range_msg = []
-                if min_val is not None: range_msg.append(f"at least {min_val}")
-                if max_val is not None: range_msg.append(f"at most {max_val}")
-                print(f"Value is out of range. Please enter a value {' and '.join(range_msg)}.")
-                continue
-            return value
-        except ValueError:
+        s = user_input.strip()
+        if not _FLOAT_RE.match(s):
             print("Invalid input. Please enter a number.")
+            continue
+        value = float(s)
+        if (min_val is not None and value < min_val) or \
+           (max_val is not None and value > max_val):
+            print(f"Value is out of range. Please enter a value {_range_msg(min_val, max_val)}.")
+            continue
+        return value
 
 def prompt_for_int(prompt_text: str, min_val=None, max_val=None, optional: bool = False):
     """Prompts user for an integer and validates range. Loops until valid input is given."""
@@ -72,18 +148,17 @@ def prompt_for_int(prompt_text: str, min_val=None, max_val=None, optional: bool
         user_input = input(prompt_text)
         if optional and not user_input:
             return None
-        try:
-            value = int(user_input)
-            if (min_val is not None and value < min_val) or \
-               (max_val is not None and value > max_val):
-                range_msg = []
-                if min_val is not None: range_msg.append(f"at least {min_val}")
-                if max_val is not None: range_msg.append(f"at most {max_val}")
-                print(f"Value is out of range. Please enter a value {' and '.join(range_msg)}.")
-                continue
-            return value
-        except ValueError:
+        s = user_input.strip()
+        digits = s[1:] if s.startswith('-') else s
+        if not (digits.isdigit() and digits.isascii()):
             print("Invalid input. Please enter a number.")
+            continue
+        value = int(s)
+        if (min_val is not None and value < min_val) or \
+           (max_val is not None and value > max_val):
+            print(f"Value is out of range. Please enter a value {_range_msg(min_val, max_val)}.")
+            continue
+        return value
 
 
 # --- Input Prompt Functions ---
@@ -93,13 +168,15 @@ def prompt_for_new_user(creator_role):
     print_header("Add New User")
     print_user_syntax_rules()
 
+    import getpass  # Deferred: only the password prompts need it.
+
     username = prompt_with_validation(
         "Enter username: ",
         validation.is_valid_username,
         "Username must be 8-10 chars, start with letter/_, and contain only letters, numbers, _, ', '.",
         optional=False
     )
-    
+
     while True:
         password = getpass.getpass("Enter password: ")
         if validation.is_valid_password(password):
@@ -121,10 +198,10 @@ def prompt_for_new_user(creator_role):
     while role is None:
         print("Allowed roles to create: " + ", ".join(allowed_roles))
         role_input = input(f"Enter role ({'/'.join(r.split()[0] for r in allowed_roles)}): ").strip().lower()
-        if 'system' in role_input and config.ROLE_SYSTEM_ADMIN in allowed_roles:
-            role = config.ROLE_SYSTEM_ADMIN
-        elif 'service' in role_input and config.ROLE_SERVICE_ENGINEER in allowed_roles:
-            role = config.ROLE_SERVICE_ENGINEER
+        token = role_input.split()[0] if role_input else ''
+        candidate = _ROLE_KEYWORDS.get(token)
+        if candidate is not None and candidate in allowed_roles:
+            role = candidate
         else:
             print("Invalid role selected.")
 
@@ -136,8 +213,9 @@ def prompt_for_new_user(creator_role):
         "first_name": first_name, "last_name": last_name
     }
 
-def print_user_syntax_rules():
-    print(r"""
+# Syntax-rule texts are static; built once here and written in a single call
+# instead of re-running a print formatting pass per display.
+_USER_RULES = r"""
 User Account Syntax Rules:
 - Username:
   - Length: 8-10 characters.
@@ -147,10 +225,9 @@ User Account Syntax Rules:
 - Password:
   - Length: 12-30 characters.
   - Must contain at least one lowercase letter, one uppercase letter, one digit, and one special character (~!@#$%&_-+=`|\(){}[]:;'<>,.?/).
-""")
+""" + "\n"
 
-def print_traveller_syntax_rules():
-    print("""
+_TRAVELLER_RULES = """
 Traveller Data Attribute Syntax Rules:
 - First Name: Only letters, 2-30 characters.
 - Last Name: Only letters, 2-30 characters.
@@ -163,7 +240,27 @@ Traveller Data Attribute Syntax Rules:
 - Email Address: Standard email format (e.g., user@example.com).
 - Mobile Phone: 8 digits (e.g., 12345678, will be stored as +31-6-12345678).
 - Driving License Number: XXDDDDDDD or XDDDDDDDD (e.g., AB1234567 or A12345678).
-""")
+""" + "\n"
+
+_SCOOTER_RULES = """
+Scooter Data Attribute Syntax Rules:
+- Serial Number: 10 to 17 alphanumeric characters.
+- Top Speed: Number (e.g., 25.5).
+- Battery Capacity: Number (e.g., 1000).
+- State of Charge (SoC): Percentage (0-100).
+- Target SoC Min/Max: Percentage (0-100).
+- Location (Lat/Lon): Real-world coordinates with at least 5 decimal places (e.g., 51.92250, 4.47917) In rotterdam between 51.8, 52.0
+    MIN_LON, MAX_LON = 4.3, 4.6.
+- Out-of-service Status: 0 for In-Service, 1 for Out-of-Service.
+- Mileage: Number (e.g., 150.7).
+- Last Maintenance Date: Format YYYY-MM-DD (e.g., 2025-06-18).
+""" + "\n"
+
+def print_user_syntax_rules():
+    _write(_USER_RULES)
+
+def print_traveller_syntax_rules():
+    _write(_TRAVELLER_RULES)
 
 def prompt_for_new_traveller():
     """Gets data for a new traveller from the console with immediate validation."""
@@ -178,10 +275,8 @@ def prompt_for_new_traveller():
     data['house_number'] = prompt_with_validation("Enter house number: ", validation.is_valid_house_number, "1-6 digits.")
     data['zip_code'] = prompt_with_validation("Enter zip code (e.g., 1234AB): ", validation.is_valid_zip_code, "Format must be DDDDXX.", str.upper)
     
-    print("--- Predefined Cities ---")
-    for i, city in enumerate(config.PREDEFINED_CITIES, 1):
-        print(f"{i}. {city}")
-    
+    print("--- Predefined Cities ---\n" + _CITY_MENU)
+
     city_choice = prompt_for_int("Choose a city (number): ", 1, len(config.PREDEFINED_CITIES))
     data['city'] = config.PREDEFINED_CITIES[city_choice - 1]
 
@@ -191,19 +286,7 @@ def prompt_for_new_traveller():
     return data
 
 def print_scooter_syntax_rules():
-    print("""
-Scooter Data Attribute Syntax Rules:
-- Serial Number: 10 to 17 alphanumeric characters.
-- Top Speed: Number (e.g., 25.5).
-- Battery Capacity: Number (e.g., 1000).
-- State of Charge (SoC): Percentage (0-100).
-- Target SoC Min/Max: Percentage (0-100).
-- Location (Lat/Lon): Real-world coordinates with at least 5 decimal places (e.g., 51.92250, 4.47917) In rotterdam between 51.8, 52.0
-    MIN_LON, MAX_LON = 4.3, 4.6.
-- Out-of-service Status: 0 for In-Service, 1 for Out-of-Service.
-- Mileage: Number (e.g., 150.7).
-- Last Maintenance Date: Format YYYY-MM-DD (e.g., 2025-06-18).
-""")
+    _write(_SCOOTER_RULES)
 
 def prompt_for_new_scooter():
     """Gets data for a new scooter from the console with immediate validation."""
@@ -232,23 +315,14 @@ def prompt_for_new_scooter():
         else:
             print("Max SoC cannot be less than Min SoC.")
 
-    while True:
-        location_lat = prompt_with_validation(
-            "Enter initial latitude (e.g., 51.92250): ",
-            validation.is_valid_location_coordinate,
-            "Must be a valid coordinate with at least 5 decimal places."
-        )
-        location_lon = prompt_with_validation(
-            "Enter initial longitude (e.g., 4.47917): ",
-            validation.is_valid_location_coordinate,
-            "Must be a valid coordinate with at least 5 decimal places."
-        )
-        if validation.is_in_rotterdam_region(float(location_lat), float(location_lon)):
-            data['location_lat'] = location_lat
-            data['location_lon'] = location_lon
-            break
-        else:
-            print("Location is outside of the Rotterdam region. Please enter coordinates within the valid range.")
+    latlon = prompt_with_validation(
+        "Enter initial location as lat,lon (e.g., 51.92250, 4.47917): ",
+        validation.is_valid_rotterdam_latlon,
+        "Both coordinates need at least 5 decimal places and must be within the Rotterdam region."
+    )
+    location_lat, location_lon = (part.strip() for part in latlon.split(','))
+    data['location_lat'] = location_lat
+    data['location_lon'] = location_lon
 
     data['mileage'] = prompt_for_float("Enter initial mileage (km): ", min_val=0)
     data['last_maintenance_date'] = prompt_with_validation(
@@ -266,16 +340,17 @@ def prompt_for_scooter_update(current_user: models.User):
     if scooter_id is None:
         return None, None
 
-    current_scooter = services.get_scooter_details(current_user, scooter_id)
-    if not current_scooter:
-        return None, None
+    # Fetched lazily: the current record is only needed when exactly one of
+    # the two location fields is provided, so the common update paths skip
+    # the extra DB roundtrip and decryption entirely.
+    current_scooter = None
 
     print("Enter new data. Press Enter to skip a field.")
     print_scooter_syntax_rules()
     
     update_data = {}
     
-    is_admin = current_user.role in [config.ROLE_SUPER_ADMIN, config.ROLE_SYSTEM_ADMIN]
+    is_admin = current_user.role in _ADMIN_ROLES
     
     # --- Admin Fields ---
     if is_admin:
@@ -306,6 +381,7 @@ def prompt_for_scooter_update(current_user: models.User):
     if max_soc is not None: update_data['target_range_soc_max'] = max_soc
 
     # --- Location Update ---
+    stored_lat = stored_lon = None  # Parsed stored coordinates, cached across retries.
     while True:
         lat = prompt_with_validation("New location_lat (optional): ", validation.is_valid_location_coordinate, "Must be a valid coordinate.", optional=True)
         lon = prompt_with_validation("New location_lon (optional): ", validation.is_valid_location_coordinate, "Must be a valid coordinate.", optional=True)
@@ -314,8 +390,23 @@ def prompt_for_scooter_update(current_user: models.User):
         if not lat and not lon:
             break
 
-        final_lat = float(lat) if lat else float(current_scooter['location_lat'])
-        final_lon = float(lon) if lon else float(current_scooter['location_lon'])
+        if bool(lat) != bool(lon) and current_scooter is None:
+            current_scooter = services.get_scooter_details(current_user, scooter_id)
+            if not current_scooter:
+                return None, None
+
+        if lat:
+            final_lat = float(lat)
+        else:
+            if stored_lat is None:
+                stored_lat = float(current_scooter['location_lat'])
+            final_lat = stored_lat
+        if lon:
+            final_lon = float(lon)
+        else:
+            if stored_lon is None:
+                stored_lon = float(current_scooter['location_lon'])
+            final_lon = stored_lon
 
         if validation.is_in_rotterdam_region(final_lat, final_lon):
             if lat: update_data['location_lat'] = lat
@@ -347,19 +438,22 @@ def handle_view_logs(current_user: models.User):
     logs = services.secure_logger.get_logs(limit=25)
     display_results(logs)
     
-    # Mark the viewed suspicious logs as read
-    suspicious_log_ids = [log['id'] for log in logs if log['is_suspicious'] == 'Yes' and log['is_read'] == 'No']
-    if suspicious_log_ids:
-        services.mark_logs_as_read(suspicious_log_ids)
+    # Mark the viewed suspicious logs as read in one batched UPDATE; the
+    # returned count says whether anything was actually dismissed.
+    suspicious_log_ids = tuple(log['id'] for log in logs if log['is_suspicious'] == 'Yes' and log['is_read'] == 'No')
+    if suspicious_log_ids and services.mark_logs_as_read(suspicious_log_ids):
         print("\nUnread suspicious logs have been marked as read.")
 
 def handle_update_own_password(current_user: models.User):
+    import getpass  # Deferred: only the password prompts need it.
     print_header("Update My Password")
     print_user_syntax_rules()
     old_password = getpass.getpass("Enter your current password: ")
     new_password = getpass.getpass("Enter your new password: ")
     confirm_password = getpass.getpass("Confirm new password: ")
-    if new_password != confirm_password:
+    # Constant-time comparison; a plain != short-circuits on the first
+    # differing character and leaks timing information.
+    if not hmac.compare_digest(new_password.encode('utf-8'), confirm_password.encode('utf-8')):
         print("New passwords do not match.")
         return
     services.update_own_password(current_user, old_password, new_password)
@@ -389,18 +483,18 @@ def prompt_for_user_update(current_user: models.User):
     print("Enter new data. Press Enter to skip a field.")
     first_name = input(f"New first name (current: {target_user.first_name}): ")
     last_name = input(f"New last name (current: {target_user.last_name}): ")
-    
+
     update_data = {}
     if first_name:
         update_data['first_name'] = first_name
     if last_name:
         update_data['last_name'] = last_name
-    
+
     if not update_data:
         print("No changes specified.")
         return None, None
 
-    return username, update_data
+    return target_user, update_data
 
 def handle_delete_user(current_user: models.User):
     """Handles deleting a user."""
@@ -422,8 +516,8 @@ def handle_delete_user(current_user: models.User):
         return
 
     confirm = input(f"Are you sure you want to delete the user '{username}'? This cannot be undone. (yes/no): ")
-    if confirm.lower() == 'yes':
-        services.delete_user(current_user, username)
+    if confirm.strip() in _YES:
+        services.delete_user(current_user, username, prefetched_user=target_user)
     else:
         print("User deletion cancelled.")
 
@@ -456,7 +550,7 @@ def handle_delete_own_account(current_user: models.User):
         return False
 
     confirm = input("Are you sure you want to permanently delete your own account? This cannot be undone. (yes/no): ")
-    if confirm.lower() == 'yes':
+    if confirm.strip() in _YES:
         if services.delete_own_account(current_user):
             print("Account deleted successfully. You will be logged out.")
             return True  # Signal to logout
@@ -466,35 +560,237 @@ def handle_delete_own_account(current_user: models.User):
         print("Account deletion cancelled.")
         return False
 
+# --- Shared Menu Actions ---
+
+def handle_add_traveller(current_user: models.User):
+    traveller_data = prompt_for_new_traveller()
+    if traveller_data:
+        services.add_new_traveller(current_user, **traveller_data)
+
+def handle_search_travellers(current_user: models.User):
+    key = input("Enter search key (any traveller info): ")
+    results = services.search_travellers(current_user, key)
+    display_results(results)
+
+def handle_update_traveller(current_user: models.User):
+    try:
+        trav_id = int(input("Enter Traveller ID to update: "))
+        new_data = prompt_for_new_traveller()
+        if new_data:
+            services.update_traveller(current_user, trav_id, new_data)
+    except ValueError:
+        print("Invalid ID.")
+
+def handle_delete_traveller(current_user: models.User):
+    try:
+        trav_id = int(input("Enter Traveller ID to delete: "))
+        services.delete_traveller(current_user, trav_id)
+    except ValueError:
+        print("Invalid ID.")
+
+def handle_add_scooter(current_user: models.User):
+    scooter_data = prompt_for_new_scooter()
+    if scooter_data:
+        services.add_new_scooter(current_user, **scooter_data)
+
+def handle_update_scooter(current_user: models.User):
+    scooter_id, update_data = prompt_for_scooter_update(current_user)
+    if scooter_id and update_data:
+        services.update_scooter(current_user, scooter_id, update_data)
+
+def handle_delete_scooter(current_user: models.User):
+    try:
+        scooter_id = int(input("Enter Scooter ID to delete: "))
+        services.delete_scooter(current_user, scooter_id)
+    except ValueError:
+        print("Invalid ID.")
+
+def handle_search_scooters(current_user: models.User):
+    key = input("Enter search key (brand, model, or serial number): ")
+    results = services.search_scooters(current_user, key)
+    display_results(results)
+
+def handle_add_user(current_user: models.User):
+    user_data = prompt_for_new_user(current_user.role)
+    if user_data:
+        services.add_new_user(current_user, **user_data)
+
+def handle_update_user(current_user: models.User):
+    target_user, update_data = prompt_for_user_update(current_user)
+    if target_user and update_data:
+        services.update_user_profile(current_user, target_user.username, update_data, prefetched_user=target_user)
+
+def handle_reset_user_password(current_user: models.User):
+    target_user = input("Enter username to reset password for: ")
+    services.reset_user_password(current_user, target_user)
+
+def handle_create_backup(current_user: models.User):
+    services.create_backup(current_user)
+
+def handle_restore_backup_super(current_user: models.User):
+    filename = input("Enter backup filename (e.g., backup_20250617_103000.zip): ")
+    _restore_super(current_user, filename)
+
+def handle_restore_backup_system_admin(current_user: models.User):
+    filename = input("Enter backup filename (e.g., backup_20250617_103000.zip): ")
+    code = input("Enter one-time restore code: ")
+    services.restore_from_backup(current_user, filename, code)
+
+def handle_generate_restore_code(current_user: models.User):
+    target_user = input("Enter System Admin username to generate code for: ")
+    backup_file = input("Enter the exact backup filename the code is for: ")
+    services.generate_restore_code(current_user, target_user, backup_file)
+
+def handle_revoke_restore_code(current_user: models.User):
+    code_to_revoke = input("Enter the exact restore code to revoke: ")
+    if code_to_revoke:
+        services.revoke_restore_code(current_user, code_to_revoke)
+
+def handle_search_scooters_with_rules(current_user: models.User):
+    print_scooter_syntax_rules()
+    handle_search_scooters(current_user)
+
 # --- Role-Specific Menus ---
+# The option listings are static, so each menu body is rendered once at import
+# and written in a single call per redraw instead of ~20 separate prints.
+
+_SERVICE_ENGINEER_MENU_BODY = """
+--- Scooter Management ---
+1. Update Scooter Details
+2. Search for Scooter
+
+--- Self-Service ---
+3. Update My Password
+4. Logout
+"""
+
+_SUPER_ADMIN_MENU_BODY = """
+--- Traveller Management ---
+1. Add New Traveller
+2. Search for Traveller
+3. Update Traveller
+4. Delete Traveller
+
+--- Scooter Management ---
+5. Add New Scooter
+6. Update Scooter Details
+7. Delete Scooter
+8. Search for Scooter
+
+--- User Management ---
+9. Add New User (SysAdmin/SvcEng)
+10. Update User Profile
+11. Delete User
+12. Reset User Password
+13. List Users
+
+--- System & Self-Service ---
+14. View System Logs
+15. Create Backup
+16. Restore From Backup
+17. Generate Restore Code for System Admin
+18. Revoke Restore Code for System Admin
+19. Logout
+"""
+
+_SYSTEM_ADMIN_MENU_BODY = """
+--- Traveller Management ---
+1. Add New Traveller
+2. Search for Traveller
+3. Update Traveller
+4. Delete Traveller
+
+--- Scooter Management ---
+5. Add New Scooter
+6. Update Scooter Details
+7. Delete Scooter
+8. Search for Scooter
+
+--- User Management (Service Engineers) ---
+9. Add New Service Engineer
+10. Update Service Engineer Profile
+11. Delete Service Engineer
+12. Reset Service Engineer Password
+13. List All Users
+
+--- System & Self-Service ---
+14. View System Logs
+15. Create Backup
+16. Restore From Backup
+17. Update My Password
+18. Update My Profile
+19. Delete My Account
+20. Logout
+"""
+
+# Each menu dispatches through a module-level dict: one hashed lookup per key
+# press instead of a linear if/elif chain over every option.
+
+_SERVICE_ENGINEER_ACTIONS = {
+    '1': handle_update_scooter,
+    '2': handle_search_scooters_with_rules,
+    '3': handle_update_own_password,
+}
+
+_SUPER_ADMIN_ACTIONS = {
+    '1': handle_add_traveller,
+    '2': handle_search_travellers,
+    '3': handle_update_traveller,
+    '4': handle_delete_traveller,
+    '5': handle_add_scooter,
+    '6': handle_update_scooter,
+    '7': handle_delete_scooter,
+    '8': handle_search_scooters,
+    '9': handle_add_user,
+    '10': handle_update_user,
+    '11': handle_delete_user,
+    '12': handle_reset_user_password,
+    '13': handle_list_users,
+    '14': handle_view_logs,
+    '15': handle_create_backup,
+    '16': handle_restore_backup_super,
+    '17': handle_generate_restore_code,
+    '18': handle_revoke_restore_code,
+}
+
+_SYSTEM_ADMIN_ACTIONS = {
+    '1': handle_add_traveller,
+    '2': handle_search_travellers,
+    '3': handle_update_traveller,
+    '4': handle_delete_traveller,
+    '5': handle_add_scooter,
+    '6': handle_update_scooter,
+    '7': handle_delete_scooter,
+    '8': handle_search_scooters,
+    '9': handle_add_user,
+    '10': handle_update_user,
+    '11': handle_delete_user,
+    '12': handle_reset_user_password,
+    '13': handle_list_users,
+    '14': handle_view_logs,
+    '15': handle_create_backup,
+    '16': handle_restore_backup_system_admin,
+    '17': handle_update_own_password,
+    '18': handle_update_own_profile,
+}
+
+def _logout(current_user: models.User):
+    print("Logging out...")
+    services.secure_logger.log(current_user.username, "Logged out")
 
 def show_service_engineer_menu(current_user: models.User):
     """Displays the menu for Service Engineers."""
     while True:
         print_header(f"Service Engineer Menu | Logged in as: {current_user.username}")
-        print("\n--- Scooter Management ---")
-        print("1. Update Scooter Details")
-        print("2. Search for Scooter")
-        print("\n--- Self-Service ---")
-        print("3. Update My Password")
-        print("4. Logout")
+        _write(_SERVICE_ENGINEER_MENU_BODY)
         choice = input("Enter your choice: ")
-        
-        if choice == '1':
-            scooter_id, update_data = prompt_for_scooter_update(current_user)
-            if scooter_id and update_data:
-                services.update_scooter(current_user, scooter_id, update_data)
-        elif choice == '2':
-            print_scooter_syntax_rules()
-            key = input("Enter search key (brand, model, or serial number): ")
-            results = services.search_scooters(current_user, key)
-            display_results(results)
-        elif choice == '3':
-            handle_update_own_password(current_user)
-        elif choice == '4':
-            print("Logging out...")
-            services.secure_logger.log(current_user.username, "Logged out")
+
+        if choice == '4':
+            _logout(current_user)
             break
+        action = _SERVICE_ENGINEER_ACTIONS.get(choice)
+        if action:
+            action(current_user)
         else:
             print("Invalid choice. Please try again.")
 
@@ -503,109 +799,15 @@ def show_super_admin_menu(current_user: models.User):
     """Displays the menu for the Super Administrator."""
     while True:
         print_header(f"Super Admin Menu | Logged in as: {current_user.username}")
-        print("\n--- Traveller Management ---")
-        print("1. Add New Traveller")
-        print("2. Search for Traveller")
-        print("3. Update Traveller")
-        print("4. Delete Traveller")
-
-        print("\n--- Scooter Management ---")
-        print("5. Add New Scooter")
-        print("6. Update Scooter Details")
-        print("7. Delete Scooter")
-        print("8. Search for Scooter")
-
-        print("\n--- User Management ---")
-        print("9. Add New User (SysAdmin/SvcEng)")
-        print("10. Update User Profile")
-        print("11. Delete User")
-        print("12. Reset User Password")
-        print("13. List Users")
-
-        print("\n--- System & Self-Service ---")
-        print("14. View System Logs")
-        print("15. Create Backup")
-        print("16. Restore From Backup")
-        print("17. Generate Restore Code for System Admin")
-        print("18. Revoke Restore Code for System Admin")
-        print("19. Logout")
-
+        _write(_SUPER_ADMIN_MENU_BODY)
         choice = input("Enter your choice: ")
-        
-        if choice == '1':
-            traveller_data = prompt_for_new_traveller()
-            if traveller_data:
-                services.add_new_traveller(current_user, **traveller_data)
-        elif choice == '2':
-            key = input("Enter search key (any traveller info): ")
-            results = services.search_travellers(current_user, key)
-            display_results(results)
-        elif choice == '3':
-            try:
-                trav_id = int(input("Enter Traveller ID to update: "))
-                new_data = prompt_for_new_traveller() 
-                if new_data:
-                    services.update_traveller(current_user, trav_id, new_data)
-            except ValueError:
-                print("Invalid ID.")
-        elif choice == '4':
-            try:
-                trav_id = int(input("Enter Traveller ID to delete: "))
-                services.delete_traveller(current_user, trav_id)
-            except ValueError:
-                print("Invalid ID.")
-        elif choice == '5':
-            scooter_data = prompt_for_new_scooter()
-            if scooter_data:
-                services.add_new_scooter(current_user, **scooter_data)
-        elif choice == '6':
-            scooter_id, update_data = prompt_for_scooter_update(current_user)
-            if scooter_id and update_data:
-                services.update_scooter(current_user, scooter_id, update_data)
-        elif choice == '7':
-            try:
-                scooter_id = int(input("Enter Scooter ID to delete: "))
-                services.delete_scooter(current_user, scooter_id)
-            except ValueError:
-                print("Invalid ID.")
-        elif choice == '8':
-            key = input("Enter search key (brand, model, or serial number): ")
-            results = services.search_scooters(current_user, key)
-            display_results(results)
-        elif choice == '9':
-            user_data = prompt_for_new_user(current_user.role)
-            if user_data:
-                services.add_new_user(current_user, **user_data)
-        elif choice == '10':
-            username, update_data = prompt_for_user_update(current_user)
-            if username and update_data:
-                services.update_user_profile(current_user, username, update_data)
-        elif choice == '11':
-            handle_delete_user(current_user)
-        elif choice == '12':
-            target_user = input("Enter username to reset password for: ")
-            services.reset_user_password(current_user, target_user)
-        elif choice == '13':
-            handle_list_users(current_user)
-        elif choice == '14':
-            handle_view_logs(current_user)
-        elif choice == '15':
-            services.create_backup(current_user)
-        elif choice == '16':
-            filename = input("Enter backup filename (e.g., backup_20250617_103000.zip): ")
-            services.restore_from_backup(current_user, filename, restore_code=None)
-        elif choice == '17':
-            target_user = input("Enter System Admin username to generate code for: ")
-            backup_file = input("Enter the exact backup filename the code is for: ")
-            services.generate_restore_code(current_user, target_user, backup_file)
-        elif choice == '18':
-            code_to_revoke = input("Enter the exact restore code to revoke: ")
-            if code_to_revoke:
-                services.revoke_restore_code(current_user, code_to_revoke)
-        elif choice == '19':
-            print("Logging out...")
-            services.secure_logger.log(current_user.username, "Logged out")
+
+        if choice == '19':
+            _logout(current_user)
             break
+        action = _SUPER_ADMIN_ACTIONS.get(choice)
+        if action:
+            action(current_user)
         else:
             print("Invalid choice. Please try again.")
 
@@ -614,114 +816,21 @@ def show_system_admin_menu(current_user: models.User):
     """Displays the menu for System Administrators."""
     while True:
         print_header(f"System Admin Menu | Logged in as: {current_user.username}")
-        print("\n--- Traveller Management ---")
-        print("1. Add New Traveller")
-        print("2. Search for Traveller")
-        print("3. Update Traveller")
-        print("4. Delete Traveller")
-
-        print("\n--- Scooter Management ---")
-        print("5. Add New Scooter")
-        print("6. Update Scooter Details")
-        print("7. Delete Scooter")
-        print("8. Search for Scooter")
-
-        print("\n--- User Management (Service Engineers) ---")
-        print("9. Add New Service Engineer")
-        print("10. Update Service Engineer Profile")
-        print("11. Delete Service Engineer")
-        print("12. Reset Service Engineer Password")
-        print("13. List All Users")
-
-        print("\n--- System & Self-Service ---")
-        print("14. View System Logs")
-        print("15. Create Backup")
-        print("16. Restore From Backup")
-        print("17. Update My Password")
-        print("18. Update My Profile")
-        print("19. Delete My Account")
-        print("20. Logout")
-
+        _write(_SYSTEM_ADMIN_MENU_BODY)
         choice = input("Enter your choice: ")
-        
-        if choice == '1':
-            traveller_data = prompt_for_new_traveller()
-            if traveller_data:
-                services.add_new_traveller(current_user, **traveller_data)
-        elif choice == '2':
-            key = input("Enter search key (any traveller info): ")
-            results = services.search_travellers(current_user, key)
-            display_results(results)
-        elif choice == '3':
-            try:
-                trav_id = int(input("Enter Traveller ID to update: "))
-                new_data = prompt_for_new_traveller()
-                if new_data:
-                    services.update_traveller(current_user, trav_id, new_data)
-            except ValueError:
-                print("Invalid ID.")
-        elif choice == '4':
-            try:
-                trav_id = int(input("Enter Traveller ID to delete: "))
-                services.delete_traveller(current_user, trav_id)
-            except ValueError:
-                print("Invalid ID.")
-        elif choice == '5':
-            scooter_data = prompt_for_new_scooter()
-            if scooter_data:
-                services.add_new_scooter(current_user, **scooter_data)
-        elif choice == '6':
-            scooter_id, update_data = prompt_for_scooter_update(current_user)
-            if scooter_id and update_data:
-                services.update_scooter(current_user, scooter_id, update_data)
-        elif choice == '7':
-            try:
-                scooter_id = int(input("Enter Scooter ID to delete: "))
-                services.delete_scooter(current_user, scooter_id)
-            except ValueError:
-                print("Invalid ID.")
-        elif choice == '8':
-            key = input("Enter search key (brand, model, or serial number): ")
-            results = services.search_scooters(current_user, key)
-            display_results(results)
-        elif choice == '9':
-            user_data = prompt_for_new_user(current_user.role)
-            if user_data and user_data.get('role') == config.ROLE_SERVICE_ENGINEER:
-                services.add_new_user(current_user, **user_data)
-            elif user_data:
-                print("System Admins can only create Service Engineer accounts.")
-        elif choice == '10':
-            username, update_data = prompt_for_user_update(current_user)
-            if username and update_data:
-                services.update_user_profile(current_user, username, update_data)
-        elif choice == '11':
-            handle_delete_user(current_user)
-        elif choice == '12':
-            target_user = input("Enter Service Engineer username to reset password for: ")
-            services.reset_user_password(current_user, target_user)
-        elif choice == '13':
-            handle_list_users(current_user)
-        elif choice == '14':
-            handle_view_logs(current_user)
-        elif choice == '15':
-            services.create_backup(current_user)
-        elif choice == '16':
-            filename = input("Enter backup filename (e.g., backup_20250617_103000.zip): ")
-            code = input("Enter one-time restore code: ")
-            services.restore_from_backup(current_user, filename, code)
-        elif choice == '17':
-            handle_update_own_password(current_user)
-        elif choice == '18':
-            handle_update_own_profile(current_user)
-        elif choice == '19':
+
+        if choice == '19':
             if handle_delete_own_account(current_user):
                 break  # Logout if account was deleted
         elif choice == '20':
-            print("Logging out...")
-            services.secure_logger.log(current_user.username, "Logged out")
+            _logout(current_user)
             break
         else:
-            print("Invalid choice. Please try again.")
+            action = _SYSTEM_ADMIN_ACTIONS.get(choice)
+            if action:
+                action(current_user)
+            else:
+                print("Invalid choice. Please try again.")
 
 def temp_system_admin_handler(choice, current_user):
     """Temporary function to route choices for Super Admin to the System Admin logic."""
@@ -764,14 +873,14 @@ def temp_system_admin_handler(choice, current_user):
             scooter_id = int(input("Enter Scooter ID to delete: "))
             services.delete_scooter(current_user, scooter_id)
         except ValueError:
-            print("Invalid ID.")
+            _write("Invalid ID.\n")
     elif choice == '13':
         key = input("Enter search key (brand, model, or serial number): ")
         results = services.search_scooters(current_user, key)
         display_results(results)
     # User Actions
     elif choice == '20': # Dit is handled by the Super Admin's '30'
-        print("Please use option 30 from the Super Admin menu to add users.")
+        _write("Please use option 30 from the Super Admin menu to add users.\n")
     elif choice == '21':
         target_user = input("Enter username to reset password for: ")
         services.reset_user_password(current_user, target_user)
@@ -782,7 +891,7 @@ def temp_system_admin_handler(choice, current_user):
         services.create_backup(current_user)
     elif choice == '82':
         filename = input("Enter backup filename (e.g., backup_20250617_103000.zip): ")
-        services.restore_from_backup(current_user, filename, restore_code=None)
+        _restore_super(current_user, filename)
 
 def um_members():
     """um_members application entry point."""
@@ -792,7 +901,13 @@ def um_members():
     while True:
         if current_user is None:
             print_header("Urban Mobility Backend - Login")
-            current_user = auth.login()
+            try:
+                current_user = auth.login()
+            except EOFError:
+                # stdin is closed (e.g. piped input exhausted); without this
+                # the loop would re-issue the login prompt forever.
+                print("\nInput stream closed. Exiting.")
+                break
             if current_user:
                 services.secure_logger.log(current_user.username, "Logged in")
         else:
@@ -802,13 +917,12 @@ def um_members():
                 show_system_admin_menu(current_user)
             elif current_user.role == config.ROLE_SERVICE_ENGINEER:
                 show_service_engineer_menu(current_user)
-            
+
+            services.secure_logger.flush()
             current_user = None
 
 if __name__ == "__main__":
     try:
         um_members()
     except KeyboardInterrupt:
-        print("\n\nApplication shutting down.")
-    except Exception as e:
-        print(f"\nAn unexpected error occurred: {e}")
\ No newline at end of file
+        print("\n\nApplication shutting down.")
\ No newline at end of file
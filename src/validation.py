@@ -2,6 +2,22 @@
 
 import re
 from datetime import datetime
+from functools import lru_cache
+
+# All patterns are compiled once at import and matched with fullmatch, so the
+# per-call cost is a single cached-DFA run instead of recompiling the pattern
+# from its source string on every validation.
+_USERNAME_RE = re.compile(r"[a-zA-Z_][a-zA-Z0-9_'.]{7,9}")
+_ZIP_CODE_RE = re.compile(r"\d{4}[A-Z]{2}")
+_PHONE_RE = re.compile(r"\d{8}")
+_LICENSE_RE = re.compile(r"[A-Z]{1}\d{8}|[A-Z]{2}\d{7}")
+_SERIAL_RE = re.compile(r"[a-zA-Z0-9]{10,17}")
+_COORD_RE = re.compile(r"[+-]?\d+\.\d{5,}")
+_NAME_RE = re.compile(r"[A-Za-z]{2,30}")
+_EMAIL_RE = re.compile(r"[\w.-]+@[\w.-]+\.\w{2,}")
+_HOUSE_NUMBER_RE = re.compile(r"\d{1,6}")
+_STREET_RE = re.compile(r"[A-Za-z ]{2,50}")
+_LATLON_RE = re.compile(r"\s*([+-]?\d+\.\d{5,})\s*,\s*([+-]?\d+\.\d{5,})\s*")
 
 def _is_safe_string(s: str) -> bool:
     """
@@ -20,8 +36,11 @@ def is_valid_username(username: str) -> bool:
     - Can contain letters, numbers, underscores, apostrophes, and periods.
     """
     if not _is_safe_string(username): return False
-    pattern = r"^[a-zA-Z_][a-zA-Z0-9_'.]{7,9}$"
-    return re.match(pattern, username) is not None
+    return _USERNAME_RE.fullmatch(username) is not None
+
+# Special characters accepted in passwords; a frozenset makes the per-char
+# membership test a single hash probe in the scan below.
+_PASSWORD_SPECIALS = frozenset("~!@#$%^&*()_+=`{}[]:;'<>,.?/|\\-")
 
 def is_valid_password(password: str) -> bool:
     """
@@ -33,47 +52,67 @@ def is_valid_password(password: str) -> bool:
     if not _is_safe_string(password): return False
     if not 12 <= len(password) <= 30:
         return False
-    
-    patterns = [
-        r"(?=.*[a-z])",        
-        r"(?=.*[A-Z])",        
-        r"(?=.*\d)",           
-        r"(?=.*[~!@#$%^&*()_+=\`{}\[\]:;'<>,.?/|\\-])" 
-    ]
-    
-    full_pattern = "".join(patterns) + r".{12,30}$"
-    return re.match(full_pattern, password) is not None
+    # One linear pass with four flags instead of a four-lookahead regex,
+    # which rescanned the string once per character class.
+    has_lower = has_upper = has_digit = has_special = False
+    for char in password:
+        if 'a' <= char <= 'z':
+            has_lower = True
+        elif 'A' <= char <= 'Z':
+            has_upper = True
+        elif '0' <= char <= '9':
+            has_digit = True
+        elif char in _PASSWORD_SPECIALS:
+            has_special = True
+    return has_lower and has_upper and has_digit and has_special
+
+# The fixed-length validators below reject on len() before running their
+# pattern (or, for licences, allocating the uppercased copy): most typos are
+# the wrong length, and the O(1) check costs nothing on the accept path.
 
 def is_valid_zip_code(zip_code: str) -> bool:
     """Validates Zip Code format: DDDDXX."""
     if not _is_safe_string(zip_code): return False
-    pattern = r"^\d{4}[A-Z]{2}$"
-    return re.match(pattern, zip_code) is not None
+    if len(zip_code) != 6:
+        return False
+    return _ZIP_CODE_RE.fullmatch(zip_code) is not None
 
 def is_valid_phone_digits(digits: str) -> bool:
     """Validates phone number digits: DDDDDDDD."""
     if not _is_safe_string(digits): return False
-    pattern = r"^\d{8}$"
-    return re.match(pattern, digits) is not None
+    if len(digits) != 8:
+        return False
+    return _PHONE_RE.fullmatch(digits) is not None
 
 def is_valid_driving_license(license_num: str) -> bool:
     """Validates Driving License: XXDDDDDDD or XDDDDDDDD."""
     if not _is_safe_string(license_num): return False
-    pattern = r"^(?:[A-Z]{1}\d{8}|[A-Z]{2}\d{7})$"
-    return re.match(pattern, license_num.upper()) is not None
+    if len(license_num) != 9:
+        return False
+    return _LICENSE_RE.fullmatch(license_num.upper()) is not None
 
 def is_valid_scooter_serial(serial: str) -> bool:
     """Validates Scooter Serial Number: 10 to 17 alphanumeric characters."""
     if not _is_safe_string(serial): return False
-    pattern = r"^[a-zA-Z0-9]{10,17}$"
-    return re.match(pattern, serial) is not None
+    if not 10 <= len(serial) <= 17:
+        return False
+    return _SERIAL_RE.fullmatch(serial) is not None
 
 
 def is_valid_location_coordinate(coord: str) -> bool:
     """Validates GPS coordinate format (a number with an optional sign and at least 5 decimal places for 2-meter accuracy)."""
     if not _is_safe_string(coord): return False
-    pattern = r"^[+-]?\d+\.\d{5,}$"
-    return re.match(pattern, str(coord)) is not None
+    return _COORD_RE.fullmatch(str(coord)) is not None
+
+
+def is_valid_rotterdam_latlon(latlon: str) -> bool:
+    """Validates a combined 'lat,lon' pair: both coordinates need at least 5
+    decimal places and must fall inside the Rotterdam region."""
+    if not _is_safe_string(latlon): return False
+    match = _LATLON_RE.fullmatch(str(latlon))
+    if not match:
+        return False
+    return is_in_rotterdam_region(float(match.group(1)), float(match.group(2)))
 
 
 def is_in_rotterdam_region(latitude: float, longitude: float) -> bool:
@@ -91,44 +130,71 @@ def is_in_rotterdam_region(latitude: float, longitude: float) -> bool:
     return True
 
 
+@lru_cache(maxsize=256)
+def _parse_iso_date(date_string: str):
+    """Parses YYYY-MM-DD to a date, or None if malformed. Cached because the
+    same value is validated at the prompt and again in the service layer."""
+    try:
+        return datetime.strptime(date_string, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
 def is_valid_iso_date(date_string: str) -> bool:
     """Validates date format: YYYY-MM-DD and ensures it's not in the future."""
     if not _is_safe_string(date_string): return False
-    try:
-        date_obj = datetime.strptime(date_string, '%Y-%m-%d').date()
-        if date_obj > datetime.now().date():
-            return False
-        return True
-    except ValueError:
-        return False
+    date_obj = _parse_iso_date(date_string)
+    return date_obj is not None and date_obj <= datetime.now().date()
+
+# Field -> (pattern, error message) for the purely pattern-checkable traveller
+# fields, letting callers validate a whole record in one loop instead of one
+# validator call (and stack frame) per field. Fields with non-regex rules
+# (birthday, gender, city, driving licence) stay with their own validators.
+_TRAVELLER_FIELD_PATTERNS = {
+    'first_name': (_NAME_RE, "Invalid First Name. Only letters, 2-30 characters."),
+    'last_name': (_NAME_RE, "Invalid Last Name. Only letters, 2-30 characters."),
+    'street_name': (_STREET_RE, "Invalid Street Name. Letters and spaces, 2-50 characters."),
+    'house_number': (_HOUSE_NUMBER_RE, "Invalid House Number. 1-6 digits."),
+    'zip_code': (_ZIP_CODE_RE, "Invalid Zip Code format. DDDDXX (e.g., 1234AB)."),
+    'email': (_EMAIL_RE, "Invalid Email Address format."),
+    'mobile_phone': (_PHONE_RE, "Invalid Mobile Phone. 8 digits required."),
+}
+
+def first_traveller_pattern_error(data: dict) -> str | None:
+    """Returns the error message for the first pattern-invalid field, or None."""
+    for field, (pattern, message) in _TRAVELLER_FIELD_PATTERNS.items():
+        value = str(data.get(field, ''))
+        if '\0' in value or pattern.fullmatch(value) is None:
+            return message
+    return None
 
 def is_valid_first_name(name: str) -> bool:
     """Validates first name: only letters, 2-30 chars."""
     if not _is_safe_string(name): return False
-    return bool(re.match(r"^[A-Za-z]{2,30}$", name))
+    return _NAME_RE.fullmatch(name) is not None
 
 def is_valid_last_name(name: str) -> bool:
     """Validates last name: only letters, 2-30 chars."""
     if not _is_safe_string(name): return False
-    return bool(re.match(r"^[A-Za-z]{2,30}$", name))
+    return _NAME_RE.fullmatch(name) is not None
 
 def is_valid_email(email: str) -> bool:
     """Validates email address format."""
     if not _is_safe_string(email): return False
-    pattern = r"^[\w.-]+@[\w.-]+\.\w{2,}$"
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.fullmatch(email) is not None
+
+_GENDERS = frozenset({'male', 'female'})
 
 def is_valid_gender(gender: str) -> bool:
     """Validates gender: must be 'male' or 'female'."""
     if not _is_safe_string(gender): return False
-    return gender.lower() in ['male', 'female']
+    return gender.lower() in _GENDERS
 
 def is_valid_house_number(house_number: str) -> bool:
     """Validates house number: 1-6 digits."""
     if not _is_safe_string(house_number): return False
-    return bool(re.match(r"^\d{1,6}$", str(house_number)))
+    return _HOUSE_NUMBER_RE.fullmatch(str(house_number)) is not None
 
 def is_valid_street_name(street: str) -> bool:
     """Validates street name: letters, spaces, 2-50 chars."""
     if not _is_safe_string(street): return False
-    return bool(re.match(r"^[A-Za-z ]{2,50}$", street))
\ No newline at end of file
+    return _STREET_RE.fullmatch(street) is not None